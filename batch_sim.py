@@ -0,0 +1,467 @@
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import List
+import math
+
+import numpy as np
+
+from headless import GameEnd, GameResult, run_games
+from kobo_ai import CARD_RANKS, DECK_SIZE, GREAT_RANKS, JACK, NB_RANKS, QUEEN
+from state import GameState
+
+CARD_RANK_ARRAY = np.array(CARD_RANKS, dtype=np.int8)
+IS_GREAT = np.zeros(NB_RANKS + 1, dtype=bool)
+IS_GREAT[list(GREAT_RANKS)] = True
+# empty slots have rank 0, they never prevent a kobo
+IS_GREAT_OR_EMPTY = IS_GREAT.copy()
+IS_GREAT_OR_EMPTY[0] = True
+
+RUNNING = -1
+END_CODES = [GameEnd.VICTORY, GameEnd.DECK_EXHAUSTED, GameEnd.MAX_TURNS]
+THROW_DECK_CARD = -1
+UNDECIDED = -2
+
+
+def _compact(hands: np.ndarray, discovered: np.ndarray, rows: np.ndarray):
+    """ moves the empty slots (rank 0) of `rows` at the end of the last axis,
+    keeping the order of the cards.
+    """
+    if len(rows) == 0:
+        return
+    order = np.argsort(hands[rows] == 0, axis=-1, kind='stable')
+    hands[rows] = np.take_along_axis(hands[rows], order, -1)
+    discovered[rows] = np.take_along_axis(discovered[rows], order, -1)
+
+
+def _first(mask: np.ndarray) -> np.ndarray:
+    """ returns the first index where `mask` is set along the last axis.
+    """
+    return mask.argmax(-1)
+
+
+def _worst_combinaison_index(ranks: np.ndarray) -> np.ndarray:
+    """ vectorized `get_worst_combinaison_of_cards_index`: first index of
+    the rank whose cards sum to the most points.
+    """
+    ranks = ranks.astype(np.int16)
+    nb_same = (ranks[:, :, None] == ranks[:, None, :]).sum(-1)
+    return (ranks * nb_same).argmax(-1)
+
+
+class BatchGame:
+    """ `n_games` headless games between `AIPlayer`s played in lockstep,
+    the state of every game being stored in numpy arrays shaped (n_games, ...).
+    Plays the same rules as `HeadlessGame` with `EmptyDeckRule.END_GAME`.
+    Only ranks are stored since suits never change the outcome of a game.
+    """
+    def __init__(self, n_games: int, nb_players=2, nb_cards=4, seed=None, max_turns=1000):
+        self.n_games = n_games
+        self.nb_players = nb_players
+        self.nb_cards = nb_cards
+        self.max_turns = max_turns
+        self.rng = np.random.default_rng(seed)
+        self._init_games()
+
+    def _init_games(self):
+        g, p, m = self.n_games, self.nb_players, self.nb_cards
+        decks = self.rng.random((g, DECK_SIZE)).argsort(axis=1)
+        ranks = CARD_RANK_ARRAY[decks]
+
+        self.hands = ranks[:, :p * m].reshape(g, p, m).copy()
+        self.discovered = np.zeros((g, p, m), dtype=bool)
+        self.discovered[:, :, :2] = True
+        self.deck = ranks[:, p * m:].copy()
+        self.deck_pos = np.zeros(g, dtype=np.int64)
+        offsets = np.arange(g)[:, None] * (NB_RANKS + 1)
+        self.deck_counts = np.bincount((offsets + self.deck).ravel(), minlength=g * (NB_RANKS + 1)) \
+            .reshape(g, NB_RANKS + 1).astype(np.int16)
+
+        self.kobo = np.zeros((g, p), dtype=bool)
+        self.seat = self.rng.integers(0, p, g)
+        self.nb_turns = np.zeros(g, dtype=np.int64)
+        self.winner = np.full(g, -1, dtype=np.int64)
+        self.end = np.full(g, RUNNING, dtype=np.int64)
+
+    @property
+    def done(self) -> np.ndarray:
+        return self.end != RUNNING
+
+    def play(self):
+        """ plays every game until its end.
+        """
+        while self.step():
+            pass
+        return self
+
+    def step(self) -> bool:
+        """ plays one turn in every running game.
+        Returns whether some games are still running.
+        """
+        exhausted = ~self.done & (self.deck_pos == self.deck.shape[1])
+        self.end[exhausted] = END_CODES.index(GameEnd.DECK_EXHAUSTED)
+        g = np.nonzero(~self.done)[0]
+        if len(g) == 0:
+            return False
+        n, ar = len(g), np.arange(len(g))
+        seat = self.seat[g]
+
+        # draw the deck card
+        x = self.deck[g, self.deck_pos[g]]
+        self.deck_pos[g] += 1
+        self.deck_counts[g, x] -= 1
+
+        hand = self.hands[g, seat]
+        disc = self.discovered[g, seat]
+        other_seats = np.arange(self.nb_players)[None, :] != seat[:, None]
+        opponent_is_kobo = (self.kobo[g] & other_seats).any(1)
+        sub, kobo = self._decide(hand, disc, x, self.deck_counts[g], opponent_is_kobo)
+
+        # substitute or throw the deck card, with the discovered duplicates
+        is_sub = sub >= 0
+        sub_index = np.where(is_sub, sub, 0)
+        thrown_rank = np.where(is_sub, hand[ar, sub_index], x)
+        hand[ar[is_sub], sub_index[is_sub]] = x[is_sub]
+        disc[ar[is_sub], sub_index[is_sub]] = True
+        removed = disc & (hand == thrown_rank[:, None]) & (hand > 0)
+        nb_thrown = 1 + removed.sum(1)
+        hand[removed] = 0
+        disc[removed] = False
+        _compact(hand, disc, np.nonzero(nb_thrown > 1)[0])
+
+        self._apply_jack_effect(g, seat, hand, disc, thrown_rank, nb_thrown, opponent_is_kobo)
+        self._apply_queen_effect(hand, disc, thrown_rank, nb_thrown)
+
+        kobo |= IS_GREAT_OR_EMPTY[hand].all(1)
+        self.kobo[g, seat] |= kobo
+        self.hands[g, seat] = hand
+        self.discovered[g, seat] = disc
+
+        # the other players throw their duplicates of the thrown rank
+        hands, discovered = self.hands[g], self.discovered[g]
+        duplicates = (hands == thrown_rank[:, None, None]) & other_seats[:, :, None]
+        hands[duplicates] = 0
+        discovered[duplicates] = False
+        _compact(hands, discovered, np.nonzero(duplicates.any((1, 2)))[0])
+        self.hands[g], self.discovered[g] = hands, discovered
+
+        self.nb_turns[g] += 1
+        empty = (self.hands[g] == 0).all(-1)
+        has_winner = empty.any(1)
+        winner = np.where(empty[ar, seat], seat, _first(empty))
+        self.winner[g[has_winner]] = winner[has_winner]
+        self.end[g[has_winner]] = END_CODES.index(GameEnd.VICTORY)
+        too_long = ~has_winner & (self.nb_turns[g] >= self.max_turns)
+        self.end[g[too_long]] = END_CODES.index(GameEnd.MAX_TURNS)
+        self.seat[g] = (seat + 1) % self.nb_players
+        return True
+
+    def _decide(self, hand, disc, x, deck_counts, opponent_is_kobo):
+        """ vectorized `AIPlayer.play` decision.
+        Returns the index of the substituted card or `THROW_DECK_CARD`
+        for every game, and whether the player calls kobo.
+        """
+        n, m = hand.shape
+        valid = hand > 0
+        known = valid & disc
+        hidden = valid & ~disc
+        has_hidden = hidden.any(1)
+        sub = np.full(n, UNDECIDED, dtype=np.int64)
+        kobo = np.zeros(n, dtype=bool)
+
+        def decide(mask, value):
+            selected = (sub == UNDECIDED) & mask
+            sub[selected] = value[selected] if isinstance(value, np.ndarray) else value
+            return selected
+
+        # handle kobo
+        known_jacks = known & (hand == JACK)
+        decide(opponent_is_kobo & (x == JACK), THROW_DECK_CARD)
+        decide(opponent_is_kobo & known_jacks.any(1), _first(known_jacks))
+        # handle queen
+        known_queens = known & (hand == QUEEN)
+        decide(x == QUEEN, THROW_DECK_CARD)
+        decide(known_queens.any(1) & has_hidden, _first(known_queens))
+        # handle hidden cards discover
+        decide(has_hidden, _first(hidden))
+
+        # every card is discovered from here, the deck card is appended to the hand
+        rows = np.nonzero(sub == UNDECIDED)[0]
+        hand, x = hand[rows], x[rows]
+        nb_cards = valid[rows].sum(1)
+        with_deck_card = np.zeros((len(rows), m + 1), dtype=hand.dtype)
+        with_deck_card[:, :m] = hand
+        with_deck_card[np.arange(len(rows)), nb_cards] = x
+        best_hit = self._best_hit_index(with_deck_card, nb_cards + 1, deck_counts[rows])
+        decision = np.where(best_hit == nb_cards, THROW_DECK_CARD, best_hit)
+
+        # handle every cards are great
+        all_great = IS_GREAT[with_deck_card[np.arange(len(rows)), best_hit]]
+        worst = _worst_combinaison_index(with_deck_card[all_great])
+        decision[all_great] = np.where(worst == nb_cards[all_great], THROW_DECK_CARD, worst)
+        kobo[rows[all_great]] = True
+        # handle deck card is a card we already have
+        already_have = (hand == x[:, None]).any(1)
+        decision[~all_great & already_have & ~IS_GREAT[x]] = THROW_DECK_CARD
+        # default turn
+        sub[rows] = decision
+        return sub, kobo
+
+    def _best_hit_index(self, ranks, nb_ranks, deck_counts):
+        """ vectorized `get_best_hit_index` for hands without hidden cards.
+        """
+        n = ranks.shape[0]
+        ar = np.arange(n)
+        worst = ranks[:, 0].copy()
+        worst_index = np.zeros(n, dtype=np.int64)
+        found = np.zeros(n, dtype=bool)
+        for i in range(1, ranks.shape[1]):
+            r = ranks[:, i]
+            in_hand = (i < nb_ranks) & ~found
+            occurences = deck_counts[ar, r]
+            scarce = in_hand & ((occurences == 1) | (occurences == 2)) & ~IS_GREAT[r]
+            higher = in_hand & ~scarce & (r > worst)
+            worst_index[scarce | higher] = i
+            worst[higher] = r[higher]
+            found |= scarce
+        return worst_index
+
+    def _apply_jack_effect(self, g, seat, hand, disc, thrown_rank, nb_thrown, opponent_is_kobo):
+        """ every thrown jack swaps the worst card of the player with the next
+        card of the next opponent, when an opponent called kobo.
+        """
+        jack_rows = np.nonzero((thrown_rank == JACK) & opponent_is_kobo)[0]
+        if len(jack_rows) == 0:
+            return
+        g, nb_thrown = g[jack_rows], nb_thrown[jack_rows]
+        opponent_seat = (seat[jack_rows] + 1) % self.nb_players
+        my_hand, my_disc = hand[jack_rows], disc[jack_rows]
+        other_hand = self.hands[g, opponent_seat]
+        other_disc = self.discovered[g, opponent_seat]
+        for j in range(4):
+            nb_other_cards = (other_hand > 0).sum(1)
+            swaps = (j < nb_thrown) & (my_hand > 0).any(1) & (nb_other_cards > 0)
+            if not swaps.any():
+                break
+            rows = np.nonzero(swaps)[0]
+            nb_other_cards = nb_other_cards[rows]
+            random_index = (self.rng.random(len(rows)) * nb_other_cards).astype(np.int64)
+            other_index = np.where(j < nb_other_cards, j, random_index)
+            my_index = _worst_combinaison_index(my_hand[rows])
+            my_hand[rows, my_index], other_hand[rows, other_index] = \
+                other_hand[rows, other_index], my_hand[rows, my_index]
+            my_disc[rows, my_index] = False
+            other_disc[rows, other_index] = False
+        hand[jack_rows], disc[jack_rows] = my_hand, my_disc
+        self.hands[g, opponent_seat] = other_hand
+        self.discovered[g, opponent_seat] = other_disc
+
+    def _apply_queen_effect(self, hand, disc, thrown_rank, nb_thrown):
+        """ every thrown queen discovers the first hidden card of the player.
+        """
+        hidden = (hand > 0) & ~disc
+        discovered = hidden & (hidden.cumsum(1) <= nb_thrown[:, None]) & (thrown_rank == QUEEN)[:, None]
+        disc |= discovered
+
+    def results(self) -> List[GameResult]:
+        return [
+            GameResult(None if w == -1 else int(w), int(t), END_CODES[e])
+            for w, t, e in zip(self.winner, self.nb_turns, self.end)
+        ]
+
+
+def run_batch(n_games: int, seed=None, nb_players=2, nb_cards=4, max_turns=1000) -> BatchGame:
+    return BatchGame(n_games, nb_players=nb_players, nb_cards=nb_cards, seed=seed, max_turns=max_turns).play()
+
+
+class BatchRollouts:
+    """ playouts of `state.rollout_action` from many `GameState`s played in
+    lockstep, like `BatchGame` plays `AIPlayer`. `add` takes a state at the
+    start of a turn and the number of playouts to run from it, each with
+    its own order of the deck, which nobody has seen. `play` runs them all.
+    Hands are at most `width` cards.
+    """
+    def __init__(self, nb_players: int, width: int, rng: np.random.Generator):
+        self.nb_players = nb_players
+        self.width = width
+        self.rng = rng
+        self._clear()
+
+    def _clear(self):
+        self._hands = []
+        self._discovered = []
+        self._decks = []
+        self._seats = []
+        self._deck_cards = []
+        self._counts = []
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, state: GameState, nb_playouts: int):
+        padding = [0] * self.width
+        for hand in state.hands:
+            cards, discovered = hand.cards, hand.discovered
+            self._hands.append(([CARD_RANKS[c] for c in cards] + padding)[:self.width])
+            self._discovered.append([(discovered >> i) & 1 for i in range(self.width)])
+        self._decks.append([CARD_RANKS[c] for c in state.deck])
+        self._seats.append(state.turn)
+        self._deck_cards.append(CARD_RANKS[state.deck_card])
+        self._counts.append(nb_playouts)
+
+    def play(self, max_turns: int=None) -> np.ndarray:
+        """ plays every playout for at most `max_turns` turns and empties the
+        batch. Returns the rewards shaped (states, players), averaged over the
+        playouts of each state: 1 for the winner, otherwise shared by the
+        players with the fewest cards.
+        """
+        p, m = self.nb_players, self.width
+        counts = np.array(self._counts)
+        hands = np.repeat(np.array(self._hands, dtype=np.int8).reshape(-1, p, m), counts, 0)
+        discovered = np.repeat(np.array(self._discovered, dtype=bool).reshape(-1, p, m), counts, 0)
+        seat = np.repeat(np.array(self._seats), counts)
+        x = np.repeat(np.array(self._deck_cards, dtype=np.int8), counts)
+        deck_len = np.repeat(np.array([len(d) for d in self._decks]), counts)
+        decks = np.zeros((len(counts), max(1, deck_len.max())), dtype=np.int8)
+        for i, d in enumerate(self._decks):
+            decks[i, :len(d)] = d
+        deck = np.repeat(decks, counts, 0)
+        keys = self.rng.random(deck.shape)
+        keys[np.arange(deck.shape[1]) >= deck_len[:, None]] = 2.
+        deck = np.take_along_axis(deck, keys.argsort(1), 1)
+        self._clear()
+
+        n_rows = len(seat)
+        winner = np.full(n_rows, -1)
+        running = np.ones(n_rows, dtype=bool)
+        nb_turns = 0
+        while max_turns is None or nb_turns < max_turns:
+            g = np.nonzero(running)[0]
+            if len(g) == 0:
+                break
+            self._turn(g, hands, discovered, deck, deck_len, seat, x, winner, running)
+            nb_turns += 1
+
+        nb_cards = (hands > 0).sum(-1)
+        fewest = nb_cards == nb_cards.min(1, keepdims=True)
+        rewards = fewest / fewest.sum(1, keepdims=True)
+        has_winner = winner >= 0
+        rewards[has_winner] = 0.
+        rewards[has_winner, winner[has_winner]] = 1.
+        return np.add.reduceat(rewards, np.cumsum(counts) - counts, 0) / counts[:, None]
+
+    def _turn(self, g, hands, discovered, deck, deck_len, seat, x, winner, running):
+        n, ar = len(g), np.arange(len(g))
+        s, x_g = seat[g], x[g]
+        hand, disc = hands[g, s], discovered[g, s]
+
+        # discover the first hidden card, else throw the highest card if higher than the deck card
+        hidden = (hand > 0) & ~disc
+        has_hidden = hidden.any(1)
+        highest = hand.argmax(1)
+        sub = np.where(has_hidden, _first(hidden), highest)
+        is_sub = has_hidden | (hand[ar, highest] > x_g)
+        thrown_rank = np.where(is_sub, hand[ar, sub], x_g)
+        hand[ar[is_sub], sub[is_sub]] = x_g[is_sub]
+        disc[ar[is_sub], sub[is_sub]] = True
+        removed = disc & (hand == thrown_rank[:, None])
+        nb_thrown = 1 + removed.sum(1)
+        hand[removed] = 0
+        disc[removed] = False
+        _compact(hand, disc, np.nonzero(nb_thrown > 1)[0])
+
+        # jacks swap random cards with the next player, or are skipped
+        other_seat = (s + 1) % self.nb_players
+        other_hand, other_disc = hands[g, other_seat], discovered[g, other_seat]
+        nb_mine, nb_other = (hand > 0).sum(1), (other_hand > 0).sum(1)
+        pending = np.where((thrown_rank == JACK) & (nb_mine > 0) & (nb_other > 0), nb_thrown, 0)
+        while pending.any():
+            rows = np.nonzero(pending)[0]
+            nb_swaps = nb_mine[rows] * nb_other[rows]
+            choice = (self.rng.random(len(rows)) * (nb_swaps + 1)).astype(np.int64)
+            pending[rows[choice == nb_swaps]] = 0
+            swap = choice < nb_swaps
+            rows, choice = rows[swap], choice[swap]
+            i, j = choice // nb_other[rows], choice % nb_other[rows]
+            hand[rows, i], other_hand[rows, j] = other_hand[rows, j], hand[rows, i]
+            disc[rows, i] = False
+            other_disc[rows, j] = False
+            pending[rows] -= 1
+        hands[g, other_seat], discovered[g, other_seat] = other_hand, other_disc
+
+        # queens discover the first hidden cards
+        hidden = (hand > 0) & ~disc
+        disc |= hidden & (hidden.cumsum(1) <= nb_thrown[:, None]) & (thrown_rank == QUEEN)[:, None]
+        hands[g, s], discovered[g, s] = hand, disc
+
+        # the other players throw every card of the thrown rank
+        h, d = hands[g], discovered[g]
+        others = np.arange(self.nb_players)[None, :] != s[:, None]
+        duplicates = (h == thrown_rank[:, None, None]) & others[:, :, None]
+        h[duplicates] = 0
+        d[duplicates] = False
+        _compact(h, d, np.nonzero(duplicates.any((1, 2)))[0])
+        hands[g], discovered[g] = h, d
+
+        empty = (h == 0).all(-1)
+        has_winner = empty.any(1)
+        turn_winner = np.where(empty[ar, s], s, _first(empty))
+        winner[g[has_winner]] = turn_winner[has_winner]
+        over = has_winner | (deck_len[g] == 0)
+        running[g[over]] = False
+        g = g[~over]
+        seat[g] = (seat[g] + 1) % self.nb_players
+        deck_len[g] -= 1
+        x[g] = deck[g, deck_len[g]]
+
+
+@dataclass
+class EquivalenceReport:
+    """ differences between the batch and the scalar simulators, with the
+    90% confidence interval of each difference. The simulators are
+    equivalent when every interval is inside its margin (two one-sided tests
+    at the 5% level).
+    """
+    outcomes: List[str]
+    differences: List[float]
+    intervals: List[tuple]
+    margins: List[float]
+
+    @property
+    def equivalent(self) -> bool:
+        return all(-m < lo and hi < m for (lo, hi), m in zip(self.intervals, self.margins))
+
+
+def equivalence_test(n_games=20000, seed=None, nb_players=2, nb_cards=4, proportion_margin=0.02, turns_margin=0.5) -> EquivalenceReport:
+    """ plays `n_games` with both `BatchGame` and `HeadlessGame` and tests that
+    the victories of each seat, the draws and the mean number of turns match.
+    """
+    z = NormalDist().inv_cdf(0.95)
+    scalar = run_games(n_games, seed=seed, nb_players=nb_players, nb_cards=nb_cards)
+    batch = run_batch(n_games, seed=seed, nb_players=nb_players, nb_cards=nb_cards)
+
+    outcomes, differences, intervals, margins = [], [], [], []
+    scalar_winners = np.array([-1 if r.winner is None else r.winner for r in scalar])
+    for winner in [*range(nb_players), -1]:
+        p1 = (batch.winner == winner).mean()
+        p2 = (scalar_winners == winner).mean()
+        se = math.sqrt((p1 * (1 - p1) + p2 * (1 - p2)) / n_games)
+        outcomes.append(f'player {winner} wins' if winner != -1 else 'draw')
+        differences.append(float(p1 - p2))
+        intervals.append((float(p1 - p2 - z * se), float(p1 - p2 + z * se)))
+        margins.append(proportion_margin)
+
+    scalar_turns = np.array([r.nb_turns for r in scalar])
+    d = float(batch.nb_turns.mean() - scalar_turns.mean())
+    se = math.sqrt((batch.nb_turns.var(ddof=1) + scalar_turns.var(ddof=1)) / n_games)
+    outcomes.append('mean turns')
+    differences.append(d)
+    intervals.append((d - z * se, d + z * se))
+    margins.append(turns_margin)
+    return EquivalenceReport(outcomes, differences, intervals, margins)
+
+
+if __name__ == '__main__':
+    report = equivalence_test(seed=0)
+    for outcome, d, (lo, hi), m in zip(report.outcomes, report.differences, report.intervals, report.margins):
+        print(f'{outcome}: {d:+.4f} [{lo:+.4f}, {hi:+.4f}] margin {m}')
+    print('equivalent' if report.equivalent else 'NOT equivalent')
@@ -0,0 +1,150 @@
+from typing import List
+import random
+
+from kobo_ai import CARD_RANKS, NB_RANKS, NB_SUITS, AIPlayer, Game, Hand
+
+
+class BeliefTracker:
+    """ what `player` can infer about the cards it has not seen.
+    The tracker counts the ranks still unseen and, for every unseen card in
+    a hand, the ranks it can't be: once a rank is thrown, the other players
+    throw all their cards of this rank, so none of the cards left in their
+    hands has it. The probability of a rank for a card is then its unseen
+    count, zero for the excluded ranks.
+    Cards are followed by id as they move between hands, which stands for
+    their position on the table: their rank is only read once seen.
+    The tracker registers on `game` and is updated at the end of every turn
+    in O(ranks + cards in hands).
+    """
+    __slots__ = ('game', 'player', 'unseen', 'known', 'excluded', '_thrown', '_ready')
+
+    def __init__(self, game: Game, player):
+        self.game = game
+        self.player = player
+        self._ready = False
+        game.trackers = game.trackers + (self,)
+
+    def reset(self):
+        """ starts tracking from the current state of the game.
+        """
+        self.unseen = [0] + [NB_SUITS] * NB_RANKS
+        self.known = set()
+        self.excluded = {}
+        self._thrown = []
+        self._ready = True
+        self._observe_thrown()
+        self._observe_own_hand()
+
+    def _see(self, card: int):
+        if card not in self.known:
+            self.known.add(card)
+            self.unseen[CARD_RANKS[card]] -= 1
+            self.excluded.pop(card, None)
+
+    def _observe_thrown(self):
+        thrown_deck = self.game.thrown_deck
+        if len(thrown_deck) < len(self._thrown): # the thrown pile went back into the deck
+            for c in self._thrown:
+                self.known.discard(c)
+                self.unseen[CARD_RANKS[c]] += 1
+            self._thrown = []
+        for c in thrown_deck[len(self._thrown):]:
+            self._see(c)
+            self._thrown.append(c)
+
+    def _observe_own_hand(self):
+        hand = self.player.cards
+        for i, c in enumerate(hand.cards):
+            if (hand.discovered >> i) & 1:
+                self._see(c)
+
+    def observe_turn(self, player, thrown_cards: List[int]):
+        """ updates the beliefs once `player` has thrown `thrown_cards`
+        and the other players their duplicates.
+        """
+        if not self._ready:
+            self.reset()
+            return
+        self._observe_thrown()
+        self._observe_own_hand()
+        if len(thrown_cards) == 0:
+            return
+        mask = 1 << CARD_RANKS[thrown_cards[0]]
+        for other in self.game.players:
+            if other is not player:
+                for c in other.cards.cards:
+                    if c not in self.known:
+                        self.excluded[c] = self.excluded.get(c, 0) | mask
+
+    def card_distribution(self, card: int) -> List[float]:
+        """ returns the probability of each rank for a card in a hand,
+        indexed by rank.
+        """
+        if not self._ready:
+            self.reset()
+        if card in self.known:
+            probs = [0.] * (NB_RANKS + 1)
+            probs[CARD_RANKS[card]] = 1.
+            return probs
+        mask = self.excluded.get(card, 0)
+        weights = [0 if (mask >> r) & 1 else n for r, n in enumerate(self.unseen)]
+        total = sum(weights)
+        if total == 0: # inconsistent with a reshuffle, fall back on the unseen counts
+            weights, total = self.unseen, sum(self.unseen)
+        return [w / total for w in weights]
+
+    def hand_distributions(self, cards: Hand) -> List[List[float]]:
+        return [self.card_distribution(c) for c in cards.cards]
+
+    def expected_rank(self, card: int) -> float:
+        return sum(r * p for r, p in enumerate(self.card_distribution(card)))
+
+    def deck_distribution(self) -> List[float]:
+        """ returns the probability of each rank for the top card of the deck:
+        the unseen counts less the expected ranks of the unseen cards in hands.
+        """
+        counts = [float(n) for n in self.unseen]
+        for other in self.game.players:
+            for c in other.cards.cards:
+                if c not in self.known:
+                    for r, p in enumerate(self.card_distribution(c)):
+                        counts[r] -= p
+        counts = [max(n, 0.) for n in counts]
+        total = sum(counts)
+        return [n / total for n in counts] if total else counts
+
+    def determinize(self, slot_cards: List[int], pool: List[int], rng: random.Random) -> List[int]:
+        """ returns `pool` rearranged for search: one card for each of the
+        slots holding `slot_cards`, respecting the excluded ranks when
+        possible, then the deck in random order.
+        """
+        remaining = pool.copy()
+        rng.shuffle(remaining)
+        assigned = [None] * len(slot_cards)
+        for k, c in enumerate(slot_cards):
+            if c in self.known:
+                assigned[k] = c
+                remaining.remove(c)
+        for k, c in enumerate(slot_cards):
+            if assigned[k] is None:
+                mask = self.excluded.get(c, 0)
+                i = next((i for i, d in enumerate(remaining) if not (mask >> CARD_RANKS[d]) & 1), 0)
+                assigned[k] = remaining.pop(i)
+        return assigned + remaining
+
+
+class BeliefAIPlayer(AIPlayer):
+    """ the heuristic AI, swapping its jacks with the opponent's card
+    of lowest expected rank instead of the first one.
+    """
+    __slots__ = ('belief',)
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.belief = BeliefTracker(game, self)
+
+    def _jack_target_index(self, cards: Hand, do_not_choose_indexes: List[int]=[]) -> int:
+        indexes = [i for i in range(len(cards)) if i not in do_not_choose_indexes]
+        if len(indexes) == 0:
+            return super()._jack_target_index(cards, do_not_choose_indexes)
+        return min(indexes, key=lambda i: self.belief.expected_rank(cards[i]))
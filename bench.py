@@ -0,0 +1,213 @@
+from typing import Dict, List
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from headless import HeadlessGame, game_seeds, run_games
+from kobo_ai import AIPlayer
+from tournament import run_tournament
+
+# metrics where a smaller value is an improvement, the others are throughputs
+LOWER_IS_BETTER = {
+    'play_p50_us', 'play_p99_us', 'deal_us', 'bytes_per_game', 'reset_bytes_per_game', 'reset_peak_bytes',
+    'reset_gc_collections', 'import_ms'
+}
+# bytes a game replayed with `Game.reset` may keep alive, the rest are leaks
+MAX_RESET_BYTES_PER_GAME = 16
+# bytes the games replayed with `Game.reset` may allocate at once, a few games
+MAX_RESET_PEAK_BYTES = 16 * 1024
+# garbage collections the replayed games may trigger
+MAX_RESET_GC_COLLECTIONS = 0
+
+
+class _TimedAIPlayer(AIPlayer):
+    __slots__ = ()
+
+    latencies = []
+
+    def play(self, deck_card):
+        start = time.perf_counter()
+        thrown_cards = super().play(deck_card)
+        _TimedAIPlayer.latencies.append(time.perf_counter() - start)
+        return thrown_cards
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+def bench_play_latency(n_games=500, seed=0) -> Dict[str, float]:
+    """ times every `AIPlayer.play` of `n_games` seeded games.
+    """
+    _TimedAIPlayer.latencies = []
+    run_games(n_games, seed=seed, player_classes=[_TimedAIPlayer, _TimedAIPlayer])
+    latencies = _TimedAIPlayer.latencies
+    return dict(
+        play_p50_us=percentile(latencies, .5) * 1e6,
+        play_p99_us=percentile(latencies, .99) * 1e6,
+    )
+
+
+def bench_games_per_second(n_games=5000, seed=0, nb_workers=1) -> float:
+    start = time.perf_counter()
+    if nb_workers == 1:
+        run_games(n_games, seed=seed)
+    else:
+        run_tournament(n_games, seed=seed, nb_workers=nb_workers)
+    return n_games / (time.perf_counter() - start)
+
+
+def bench_deal(n_deals=20000, seed=0) -> float:
+    """ returns the mean cost of `Game._init_game` in microseconds.
+    """
+    game = HeadlessGame(seed=seed)
+    start = time.perf_counter()
+    for _ in range(n_deals):
+        game._init_game()
+    return (time.perf_counter() - start) / n_deals * 1e6
+
+
+def bench_memory(n_games=10000, seed=0) -> float:
+    """ returns the peak number of bytes allocated per game
+    when `n_games` dealt games are alive at once.
+    """
+    seeds = game_seeds(n_games, seed)
+    tracemalloc.start()
+    games = [HeadlessGame(seed=s) for s in seeds]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del games
+    return peak / n_games
+
+
+def bench_reset(n_games=2000, seed=0, warm_up=500) -> Dict[str, float]:
+    """ plays `n_games` games on one `HeadlessGame` reset between games,
+    once `warm_up` games filled the caches and the free lists of the
+    interpreter. Returns the bytes per game still allocated after the
+    games, the peak of the bytes allocated during the games and the number
+    of garbage collections they triggered, none in the steady state.
+    """
+    seeds = game_seeds(n_games + warm_up, seed)
+    warm_up_seeds, seeds = seeds[:warm_up], seeds[warm_up:]
+    game = HeadlessGame(seed=seeds[0])
+    # traced from the warm up, so that the blocks kept in the free lists
+    # are counted before the games; without a full collection after it,
+    # which would empty the free lists
+    tracemalloc.start()
+    for s in warm_up_seeds:
+        game.reset(s)
+        game.play()
+    collections = sum(stats['collections'] for stats in gc.get_stats())
+    start, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for s in seeds:
+        game.reset(s)
+        game.play()
+    collections = sum(stats['collections'] for stats in gc.get_stats()) - collections
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return dict(
+        reset_bytes_per_game=(current - start) / n_games,
+        reset_peak_bytes=peak - start,
+        reset_gc_collections=collections,
+    )
+
+
+def _import_in_new_process(module: str):
+    code = (
+        'import sys, time\n'
+        'start = time.perf_counter()\n'
+        f'import {module}\n'
+        'print(time.perf_counter() - start)\n'
+        'print(" ".join(sys.modules))\n'
+    )
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.split('\n')
+    return float(out[0]), set(out[1].split())
+
+
+def bench_import(module='kobo_ai', runs=5) -> float:
+    """ returns the median time to import `module` in a new interpreter,
+    in milliseconds, like a worker of a pool or a bot process would.
+    """
+    return statistics.median(_import_in_new_process(module)[0] for _ in range(runs)) * 1e3
+
+
+def imported_modules(module='kobo_ai') -> set:
+    """ returns the modules loaded by importing `module` in a new interpreter.
+    """
+    return _import_in_new_process(module)[1]
+
+
+def run_benchmarks(seed=0, nb_workers: int=None, scale: float=1.) -> Dict[str, float]:
+    """ runs every benchmark, `scale` multiplying the number of games.
+    """
+    nb_workers = nb_workers or os.cpu_count()
+    results = bench_play_latency(int(500 * scale), seed=seed)
+    results['games_per_second'] = bench_games_per_second(int(5000 * scale), seed=seed)
+    results[f'games_per_second_{nb_workers}_workers'] = \
+        bench_games_per_second(int(5000 * scale * nb_workers), seed=seed, nb_workers=nb_workers)
+    results['deal_us'] = bench_deal(int(20000 * scale), seed=seed)
+    results['bytes_per_game'] = bench_memory(10000, seed=seed)
+    results.update(bench_reset(int(2000 * scale), seed=seed))
+    results['import_ms'] = bench_import()
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance=0.1) -> List[str]:
+    """ returns a message for every metric of `results` more than
+    `tolerance` worse than in `baseline`.
+    """
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline:
+            continue
+        ref = baseline[name]
+        change = (value - ref) / ref if ref else 0.
+        if name not in LOWER_IS_BETTER:
+            change = -change
+        if change > tolerance:
+            regressions.append(f'{name}: {value:.2f} vs {ref:.2f} in the baseline ({change:+.1%} worse)')
+    return regressions
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='benchmarks the engine and the AI.')
+    parser.add_argument('--save', default=None, help='writes the results to this json file')
+    parser.add_argument('--baseline', default=None, help='json file of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--scale', type=float, default=1.)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = run_benchmarks(seed=args.seed, nb_workers=args.workers, scale=args.scale)
+    for name, value in results.items():
+        print(f'{name}: {value:.2f}')
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f'REGRESSION {r}')
+        if len(regressions) > 0:
+            exit(1)
+    if results['reset_bytes_per_game'] > MAX_RESET_BYTES_PER_GAME:
+        print(f'LEAK {results["reset_bytes_per_game"]:.2f} bytes per game kept by Game.reset')
+        exit(1)
+    if results['reset_peak_bytes'] > MAX_RESET_PEAK_BYTES \
+        or results['reset_gc_collections'] > MAX_RESET_GC_COLLECTIONS:
+        print(f'ALLOCATIONS {results["reset_peak_bytes"]:.0f} bytes at once and '
+              f'{results["reset_gc_collections"]:.0f} garbage collections in games replayed with Game.reset')
+        exit(1)
+    if 'kobo_ai.terminal' in imported_modules():
+        print('importing kobo_ai loads the terminal rendering')
+        exit(1)
@@ -0,0 +1,2 @@
+""" puts the top-level modules of the repository on the path of the tests.
+"""
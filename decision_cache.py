@@ -0,0 +1,196 @@
+from collections import OrderedDict
+from typing import Callable, Tuple
+import mmap
+import os
+import struct
+
+# a view packs in 55 bits: 4 bits per rank in hand, the hand size,
+# the deck card rank, the kobo flag and the mask of scarce ranks.
+MAX_HAND = 8
+_HAND_SIZE_SHIFT = 4 * MAX_HAND
+_DECK_RANK_SHIFT = _HAND_SIZE_SHIFT + 4
+_KOBO_SHIFT = _DECK_RANK_SHIFT + 4
+_SCARCE_SHIFT = _KOBO_SHIFT + 1
+
+# the disk file is a header followed by records sorted by key
+_MAGIC = b'KOBODC1\0'
+_HEADER = struct.Struct('<8sQ')
+_RECORD = struct.Struct('<QB')
+
+
+def encode_view(view) -> int:
+    """ returns the key of a view from `AIPlayer.decision_view`,
+    or None if the hand is too large to be cached.
+    """
+    ranks, deck_rank, opponent_is_kobo, scarce_ranks = view
+    if len(ranks) > MAX_HAND:
+        return None
+    key = 0
+    for i, r in enumerate(ranks):
+        key |= r << (4 * i)
+    return key | len(ranks) << _HAND_SIZE_SHIFT | deck_rank << _DECK_RANK_SHIFT \
+        | int(opponent_is_kobo) << _KOBO_SHIFT | (scarce_ranks >> 1) << _SCARCE_SHIFT
+
+
+def encode_decision(decision: Tuple[int, bool]) -> int:
+    card_index, call_kobo = decision
+    return (card_index + 1) | int(call_kobo) << 7
+
+
+def decode_decision(value: int) -> Tuple[int, bool]:
+    return (value & 0x7f) - 1, bool(value >> 7)
+
+
+class DecisionCache:
+    """ memoizes the decisions of `AIPlayer` by their view.
+    Recent decisions are kept in memory up to `capacity` entries, the least
+    recently used being evicted first. A file written by `dump` can be given as
+    `path`: it is memory mapped read-only and searched by bisection, so the
+    processes of a tournament share the same pages.
+    Install it for every AI player with `AIPlayer.decision_cache = DecisionCache(...)`.
+    """
+    def __init__(self, capacity: int=1 << 16, path: str=None):
+        self.capacity = capacity
+        self.path = path
+        self._entries = OrderedDict()
+        self._file = None
+        self._map = None
+        self._nb_records = 0
+        if path is not None and os.path.exists(path):
+            self._open(path)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _open(self, path: str):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._nb_records = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a decision cache file')
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._map, self._file, self._nb_records = None, None, 0
+
+    def _disk_get(self, key: int) -> int:
+        lo, hi = 0, self._nb_records
+        while lo < hi:
+            mid = (lo + hi) // 2
+            k, value = _RECORD.unpack_from(self._map, _HEADER.size + mid * _RECORD.size)
+            if k == key:
+                return value
+            if k < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def get(self, key: int) -> int:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return value
+        if self._map is not None:
+            value = self._disk_get(key)
+            if value is not None:
+                self.disk_hits += 1
+                self.put(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, key: int, value: int):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def get_or_decide(self, view, decide: Callable) -> Tuple[int, bool]:
+        key = encode_view(view)
+        if key is None:
+            return decide(view)
+        value = self.get(key)
+        if value is None:
+            decision = decide(view)
+            self.put(key, encode_decision(decision))
+            return decision
+        return decode_decision(value)
+
+    def items(self):
+        """ yields every (key, value), the memory entries overriding the disk ones.
+        """
+        for i in range(self._nb_records):
+            key, value = _RECORD.unpack_from(self._map, _HEADER.size + i * _RECORD.size)
+            if key not in self._entries:
+                yield key, value
+        yield from self._entries.items()
+
+    def dump(self, path: str=None):
+        """ writes the disk and memory entries to `path`, by default the file
+        of the cache, which is then reopened.
+        """
+        path = path or self.path
+        records = sorted(self.items())
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, len(records)))
+            for key, value in records:
+                f.write(_RECORD.pack(key, value))
+        if path == self.path:
+            self.close()
+        os.replace(tmp_path, path)
+        if path == self.path:
+            self._open(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.
+
+    def stats(self) -> dict:
+        return dict(
+            size=len(self),
+            capacity=self.capacity,
+            disk_records=self._nb_records,
+            memory_hits=self.memory_hits,
+            disk_hits=self.disk_hits,
+            misses=self.misses,
+            hit_rate=self.hit_rate,
+        )
+
+
+def prebuild(path: str, n: int=10000, seed=None, **game_kwargs) -> DecisionCache:
+    """ plays `n` headless games with an unbounded cache and writes
+    every decision taken to `path`.
+    """
+    from headless import run_games
+    from kobo_ai import AIPlayer
+
+    cache = DecisionCache(capacity=float('inf'), path=path)
+    previous, AIPlayer.decision_cache = AIPlayer.decision_cache, cache
+    try:
+        run_games(n, seed=seed, **game_kwargs)
+    finally:
+        AIPlayer.decision_cache = previous
+    cache.dump()
+    return cache
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='prebuilds the decision cache of the AI from self play.')
+    parser.add_argument('path')
+    parser.add_argument('-n', type=int, default=10000, help='number of games')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    cache = prebuild(args.path, args.n, seed=args.seed)
+    print(f'{cache._nb_records} decisions written to {args.path}')
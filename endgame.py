@@ -0,0 +1,218 @@
+from collections import defaultdict
+from typing import Dict, List
+import time
+
+from kobo_ai import CARD_RANKS, DECK_SIZE, THROW_DECK_CARD, AIPlayer, EmptyDeckRule, Game
+from state import KOBO, OVER, PLAY, THROW, GameState
+from transposition import TranspositionTable
+
+# translates a bytearray of cards into their ranks
+_RANK_BYTES = bytes(CARD_RANKS) + bytes(256 - DECK_SIZE)
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class EndgameSolver:
+    """ expectiminimax over the last draws of a game.
+    Once at most `max_unknown` cards are unseen by the player (its hidden
+    cards, the cards of the other players and the deck), every deal of these
+    cards is enumerated and every later draw is a chance node over the ranks
+    left in the deck. The player maximizes its expected score, 1 for a win,
+    .5 when the deck runs out and 0 for a loss, the others minimize it.
+    The values are memoized in `table` by a key of ranks, shared by every
+    turn and every game since it holds the whole state.
+    With the unseen cards dealt, the decisions after the first one are made
+    knowing them (strategy fusion): the values are an optimistic estimate,
+    exact only once every card is known.
+    Kobo calls are not searched, they don't change the rules of `GameState`,
+    and games with a kobo final round (`HeadlessGame.kobo_round`) are not
+    solved.
+    """
+    def __init__(self, max_unknown=6, time_budget: float=0.05, table_capacity: int=1 << 18):
+        self.max_unknown = max_unknown
+        self.time_budget = time_budget
+        self.table = TranspositionTable(table_capacity)
+        self.nb_nodes = 0
+        self.nb_solved = 0
+        self.nb_timeouts = 0
+        self._deadline = None
+
+    def nb_unknown(self, game: Game, player) -> int:
+        return len(game.deck) + len(player.cards.hidden_indexes()) \
+            + sum(len(p.cards) for p in game.opponents(player))
+
+    def solve(self, game: Game, player, deck_card: int, default: int=None) -> int:
+        """ returns the index of the card to substitute with `deck_card`, or
+        `THROW_DECK_CARD`, keeping `default` when it is as good as the best.
+        Returns None when too many cards are unseen, over the time budget, or
+        when the game does not end as `GameState` does: with the deck, and
+        without a final round after a kobo.
+        """
+        if game.empty_deck_rule != EmptyDeckRule.END_GAME or getattr(game, 'kobo_round', False):
+            return None
+        if self.nb_unknown(game, player) > self.max_unknown:
+            return None
+        self._deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        try:
+            values = self.action_values(GameState.from_game(game, player, deck_card))
+        except _OutOfTime:
+            self.nb_timeouts += 1
+            return None
+        self.nb_solved += 1
+        default = THROW if default == THROW_DECK_CARD else default
+        best = max(values, key=values.get)
+        if default in values and values[default] >= values[best]:
+            best = default
+        return THROW_DECK_CARD if best == THROW else best
+
+    def action_values(self, state: GameState) -> Dict[int, float]:
+        """ returns the expected score of every play of the player to move,
+        averaged over the deals of the cards it has not seen. `state` is
+        left unchanged unless the time budget runs out.
+        """
+        seat = state.turn
+        slots = [(seat, i) for i in state.hands[seat].hidden_indexes()]
+        for other in range(state.nb_players):
+            if other != seat:
+                slots += [(other, i) for i in range(len(state.hands[other]))]
+        cards = [state.hands[h][i] for h, i in slots] + state.deck
+        by_rank = defaultdict(list)
+        for c in cards:
+            by_rank[CARD_RANKS[c]].append(c)
+        actions = self._actions(state)
+        values = dict.fromkeys(actions, 0.)
+        self._deal(state, seat, slots, by_rank, len(cards), 1., actions, values)
+        for (h, i), c in zip(slots, cards):
+            state.hands[h].cards[i] = c
+        self._set_deck(state, cards[len(slots):])
+        return values
+
+    def _deal(self, state: GameState, seat: int, slots, by_rank, nb_cards: int, p: float, actions, values):
+        """ puts every rank left in the next slot, then scores the actions
+        once the slots are full.
+        """
+        if len(slots) == 0:
+            self._set_deck(state, [c for cards in by_rank.values() for c in cards])
+            for a in actions:
+                state.apply(a)
+                values[a] += p * self._value(state, seat)
+                state.undo()
+            return
+        (h, i), slots = slots[0], slots[1:]
+        for cards in list(by_rank.values()):
+            if len(cards) > 0:
+                n = len(cards)
+                state.hands[h].cards[i] = c = cards.pop()
+                self._deal(state, seat, slots, by_rank, nb_cards - 1, p * n / nb_cards, actions, values)
+                cards.append(c)
+
+    def _set_deck(self, state: GameState, deck: List[int]):
+        state.deck[:] = deck
+        deck_counts = state.counter.deck_counts
+        for r in range(len(deck_counts)):
+            deck_counts[r] = 0
+        for c in deck:
+            deck_counts[CARD_RANKS[c]] += 1
+
+    def _actions(self, state: GameState) -> List[int]:
+        actions = state.legal_actions()
+        if state.phase == PLAY:
+            return [a for a in actions if not a & KOBO]
+        return actions
+
+    def _key(self, state: GameState, seat: int, deck_rank: int) -> bytes:
+        play = state.phase == PLAY
+        key = bytearray((
+            seat, state.turn, state.phase, 0 if play else state.pending, 0 if play else state.thrown_rank, deck_rank
+        ))
+        key += bytes(state.counter.deck_counts)
+        for hand in state.hands:
+            key.append(len(hand))
+            key.append(hand.discovered)
+            key += hand.cards.translate(_RANK_BYTES)
+        return bytes(key)
+
+    def _value(self, state: GameState, seat: int) -> float:
+        """ a card was just drawn when a turn starts: averages the value of
+        the turn over the ranks it could have.
+        """
+        if state.phase == OVER:
+            return .5 if state.winner is None else float(state.winner == seat)
+        if state.phase != PLAY:
+            return self._best_value(state, seat)
+        deck, deck_counts = state.deck, state.counter.deck_counts
+        drawn = state.deck_card
+        drawn_rank = CARD_RANKS[drawn]
+        # keyed by the ranks the drawn card could have, itself included
+        deck_counts[drawn_rank] += 1
+        key = self._key(state, seat, 0)
+        deck_counts[drawn_rank] -= 1
+        value = self.table.get(key)
+        if value is not None:
+            return value
+
+        nb_cards = len(deck) + 1
+        value = 0.
+        for r in range(1, len(deck_counts)):
+            n = deck_counts[r] + (r == drawn_rank)
+            if n == 0:
+                continue
+            if r == drawn_rank:
+                value += n / nb_cards * self._best_value(state, seat)
+                continue
+            i = next(i for i, c in enumerate(deck) if CARD_RANKS[c] == r)
+            deck[i], state.deck_card = drawn, deck[i]
+            deck_counts[drawn_rank] += 1
+            deck_counts[r] -= 1
+            value += n / nb_cards * self._best_value(state, seat)
+            deck[i], state.deck_card = state.deck_card, drawn
+            deck_counts[drawn_rank] -= 1
+            deck_counts[r] += 1
+        self.table.put(key, value)
+        return value
+
+    def _best_value(self, state: GameState, seat: int) -> float:
+        """ the value of the best action for the player to move.
+        """
+        key = self._key(state, seat, CARD_RANKS[state.deck_card] if state.phase == PLAY else 0)
+        value = self.table.get(key)
+        if value is not None:
+            return value
+        self.nb_nodes += 1
+        if self._deadline is not None and self.nb_nodes & 63 == 0 and time.perf_counter() > self._deadline:
+            raise _OutOfTime()
+        maximize = state.turn == seat
+        value = None
+        for a in self._actions(state):
+            state.apply(a)
+            v = self._value(state, seat)
+            state.undo()
+            if value is None or (v > value if maximize else v < value):
+                value = v
+        self.table.put(key, value)
+        return value
+
+
+class EndgameAIPlayer(AIPlayer):
+    """ `AIPlayer` whose plays are solved by `endgame_solver` in the late game.
+    """
+    __slots__ = ()
+
+    endgame_solver = EndgameSolver()
+
+
+if __name__ == '__main__':
+    import argparse
+    from evaluation import mirrored_match
+    parser = argparse.ArgumentParser(description='evaluates the endgame solver against the heuristic AI on mirrored deals.')
+    parser.add_argument('-n', type=int, default=2000, help='number of deals')
+    parser.add_argument('--max-unknown', type=int, default=6)
+    parser.add_argument('--time-budget', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    EndgameAIPlayer.endgame_solver = EndgameSolver(args.max_unknown, args.time_budget)
+    print(mirrored_match(EndgameAIPlayer, AIPlayer, args.n, seed=args.seed, nb_workers=args.workers))
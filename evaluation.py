@@ -0,0 +1,163 @@
+from dataclasses import dataclass
+from multiprocessing import Pool
+from statistics import NormalDist
+from typing import List, Sequence, Tuple
+import math
+import os
+
+from headless import HeadlessGame, game_seeds
+from kobo_ai import AIPlayer
+
+
+@dataclass
+class PairedResult:
+    """ scores of paired deals: each score is the mean over the games of one
+    deal, 1 for a win, .5 for a draw and 0 for a loss. `unpaired_stderr` is
+    the standard error the same games would have if they were independent.
+    """
+    nb_deals: int
+    nb_games: int
+    mean: float
+    stderr: float
+    unpaired_stderr: float
+    confidence: float
+
+    @property
+    def interval(self) -> Tuple[float, float]:
+        z = NormalDist().inv_cdf(.5 + self.confidence / 2)
+        return self.mean - z * self.stderr, self.mean + z * self.stderr
+
+    @property
+    def variance_reduction(self) -> float:
+        """ how many times more independent games would give the same precision.
+        """
+        return (self.unpaired_stderr / self.stderr) ** 2 if self.stderr else math.inf
+
+    def __str__(self):
+        low, high = self.interval
+        return f'{self.mean:.4f} [{low:.4f}, {high:.4f}] at {self.confidence:.0%} over {self.nb_deals} deals, ' \
+            f'{self.nb_games} games, {self.variance_reduction:.2f}x fewer games than unpaired'
+
+
+def _stderr(values: Sequence[float]) -> float:
+    n = len(values)
+    if n < 2:
+        return math.inf
+    mean = sum(values) / n
+    return math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1) / n)
+
+
+def _score(winner, seat: int) -> float:
+    return .5 if winner is None else float(winner == seat)
+
+
+def deal_of(game: HeadlessGame) -> Tuple[bytes, ...]:
+    """ the hands and the deck order of `game`.
+    """
+    return tuple(bytes(p.cards.cards) for p in game.players) + (bytes(game.deck),)
+
+
+def _mirrored_scores(seed: int, a: type, b: type, game_kwargs: dict, deals: list) -> List[float]:
+    """ plays the deal of `seed` with `a` in each seat against `b`,
+    returns the scores of `a`. The deal of every game is checked against
+    the first one in `deals`: a player drawing from the random stream of
+    the game before the deal would break the pairing.
+    """
+    scores = []
+    for seat, player_classes in enumerate(([a, b], [b, a])):
+        game = HeadlessGame(seed=seed, player_classes=player_classes, **game_kwargs)
+        deal = deal_of(game)
+        if len(deals) == 0:
+            deals.append(deal)
+        elif deal != deals[0]:
+            raise RuntimeError(f'{a.__name__} vs {b.__name__} is not dealt the cards of the first game of the seed {seed}')
+        scores.append(_score(game.play().winner, seat))
+    return scores
+
+
+def _play_deals(args) -> List[List[float]]:
+    seeds, pairings, game_kwargs = args
+    results = []
+    for seed in seeds:
+        deals = []
+        results.append([_mirrored_scores(seed, a, b, game_kwargs, deals) for a, b in pairings])
+    return results
+
+
+def _map_deals(seeds: List[int], pairings, game_kwargs: dict, nb_workers: int, chunk_size: int):
+    chunks = [(seeds[i:i + chunk_size], pairings, game_kwargs) for i in range(0, len(seeds), chunk_size)]
+    if nb_workers == 1:
+        results = map(_play_deals, chunks)
+    else:
+        with Pool(nb_workers) as pool:
+            results = pool.map(_play_deals, chunks)
+    return [deal for chunk in results for deal in chunk]
+
+
+def _paired_result(deal_scores: List[float], game_scores: List[float], confidence: float) -> PairedResult:
+    return PairedResult(
+        nb_deals=len(deal_scores),
+        nb_games=len(game_scores),
+        mean=sum(deal_scores) / len(deal_scores),
+        stderr=_stderr(deal_scores),
+        unpaired_stderr=_stderr(game_scores),
+        confidence=confidence,
+    )
+
+
+def mirrored_match(
+    a: type,
+    b: type=AIPlayer,
+    n_deals=1000,
+    seed=None,
+    confidence=.95,
+    nb_workers: int=None,
+    chunk_size=100,
+    **game_kwargs
+    ) -> PairedResult:
+    """ plays `a` against `b` duplicate style: every deal is played twice
+    with the seats swapped, so both players get the same cards and the same
+    random numbers. Returns the score of `a` per deal.
+    """
+    deals = _map_deals(game_seeds(n_deals, seed), [(a, b)], game_kwargs, nb_workers or os.cpu_count(), chunk_size)
+    game_scores = [s for (scores,) in deals for s in scores]
+    return _paired_result([sum(scores) / 2 for (scores,) in deals], game_scores, confidence)
+
+
+def compare(
+    a: type,
+    b: type,
+    reference: type=AIPlayer,
+    n_deals=1000,
+    seed=None,
+    confidence=.95,
+    nb_workers: int=None,
+    chunk_size=100,
+    **game_kwargs
+    ) -> PairedResult:
+    """ plays `a` and `b` against `reference` on the same mirrored deals,
+    returns the difference of their scores per deal.
+    """
+    deals = _map_deals(
+        game_seeds(n_deals, seed), [(a, reference), (b, reference)], game_kwargs, nb_workers or os.cpu_count(), chunk_size
+    )
+    deal_scores = [(sum(scores_a) - sum(scores_b)) / 2 for scores_a, scores_b in deals]
+    # unpaired: a and b evaluated on independent deals
+    scores_a = [s for scores_a, _ in deals for s in scores_a]
+    scores_b = [s for _, scores_b in deals for s in scores_b]
+    result = _paired_result(deal_scores, scores_a, confidence)
+    result.nb_games *= 2
+    result.unpaired_stderr = math.sqrt(_stderr(scores_a) ** 2 + _stderr(scores_b) ** 2)
+    return result
+
+
+if __name__ == '__main__':
+    import argparse
+    from belief import BeliefAIPlayer
+    parser = argparse.ArgumentParser(description='evaluates the belief AI against the heuristic AI on mirrored deals.')
+    parser.add_argument('-n', type=int, default=10000, help='number of deals')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print(mirrored_match(BeliefAIPlayer, AIPlayer, args.n, seed=args.seed, nb_workers=args.workers))
@@ -0,0 +1,335 @@
+from typing import Iterator, List, Sequence
+import importlib
+import mmap
+import os
+import struct
+
+from headless import GameEnd, GameResult, HeadlessGame, game_seeds
+from kobo_ai import AIPlayer, CardCounter, EmptyDeckRule, Game, Hand
+
+# every record is 4 bytes: a type, a seat and two arguments
+_MAGIC = b'KOBOGL2\0'
+_RECORD = struct.Struct('<BBBB')
+RECORD_SIZE = _RECORD.size
+
+# snapshot of the game when it starts being recorded
+START = 1           # nb players, nb cards, empty deck rule | KOBO_ROUND
+HAND = 2            # seat, card, discovered
+DECK = 3            # card, from the bottom of the deck to the top
+THROWN = 4          # card
+KOBO = 5            # seat
+SNAPSHOT_END = 6
+# events of the game
+DRAW = 7            # card
+SUBSTITUTE = 8      # seat, index
+THROW = 9           # seat
+JACK = 10           # seat, other seat, my index | other index << 4
+QUEEN = 11          # seat, index
+END_TURN = 12       # seat
+DUPLICATE = 13      # seat, card
+RESHUFFLE = 14      # followed by the DECK records of the new deck
+END = 15            # winner or NO_WINNER, game end
+PLAYER = 16         # seat, length of the class path, follows START for every seat
+NAME = 17           # three bytes of the class path of the last PLAYER
+
+NO_WINNER = 0xff
+KOBO_ROUND = 0x80
+_RULES = list(EmptyDeckRule)
+_ENDS = list(GameEnd)
+
+
+class GameLogWriter:
+    """ appends the games given to `record` to the log file at `path`,
+    through a write buffer of `buffer_size` bytes.
+    """
+    def __init__(self, path: str, buffer_size: int=1 << 20):
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            with open(path, 'rb') as f:
+                if f.read(len(_MAGIC)) != _MAGIC:
+                    raise ValueError(f'{path} is not a game log of this version')
+        self._file = open(path, 'ab', buffering=buffer_size)
+        if is_new:
+            self._file.write(_MAGIC)
+        self.game = None
+        self._kobo = None
+        self._class_paths = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def _write(self, type: int, seat: int=0, a: int=0, b: int=0):
+        self._file.write(_RECORD.pack(type, seat, a, b))
+
+    def record(self, game: Game):
+        """ writes the current state of `game` and records its events
+        until its end.
+        """
+        if self.game is not None:
+            self.game.recorder = None
+        self.game = game
+        game.recorder = self
+        rule = _RULES.index(game.empty_deck_rule) | (KOBO_ROUND if getattr(game, 'kobo_round', False) else 0)
+        self._write(START, len(game.players), game.nb_cards, rule)
+        for seat, player in enumerate(game.players):
+            self._write_class(seat, type(player))
+        for seat, player in enumerate(game.players):
+            for i, c in enumerate(player.cards):
+                self._write(HAND, seat, c, player.cards.is_discovered(i))
+        for c in game.deck:
+            self._write(DECK, 0, c)
+        for c in game.thrown_deck:
+            self._write(THROWN, 0, c)
+        self._kobo = [p.is_kobo for p in game.players]
+        for seat, kobo in enumerate(self._kobo):
+            if kobo:
+                self._write(KOBO, seat)
+        self._write(SNAPSHOT_END)
+
+    def _write_class(self, seat: int, cls: type):
+        path = self._class_paths.get(cls)
+        if path is None:
+            path = self._class_paths[cls] = class_path(cls).encode()
+        self._write(PLAYER, seat, len(path))
+        for i in range(0, len(path), 3):
+            self._write(NAME, *path[i:i + 3].ljust(3, b'\0'))
+
+    def _seat(self, player) -> int:
+        return self.game.players.index(player)
+
+    def draw(self, card: int):
+        self._write(DRAW, 0, card)
+
+    def reshuffle(self, deck: List[int]):
+        self._write(RESHUFFLE)
+        for c in deck:
+            self._write(DECK, 0, c)
+
+    def substitute(self, player, index: int):
+        self._write(SUBSTITUTE, self._seat(player), index)
+
+    def throw(self, player):
+        self._write(THROW, self._seat(player))
+
+    def jack(self, player, my_index: int, other_index: int, other_cards: Hand):
+        other_seat = next(s for s, p in enumerate(self.game.players) if p.cards is other_cards)
+        self._write(JACK, self._seat(player), other_seat, my_index | other_index << 4)
+
+    def queen(self, player, index: int):
+        self._write(QUEEN, self._seat(player), index)
+
+    def duplicate(self, player, card: int):
+        self._write(DUPLICATE, self._seat(player), card)
+
+    def end_turn(self, player):
+        seat = self._seat(player)
+        if player.is_kobo and not self._kobo[seat]:
+            self._kobo[seat] = True
+            self._write(KOBO, seat)
+        self._write(END_TURN, seat)
+
+    def end(self, result: GameResult):
+        winner = NO_WINNER if result.winner is None else result.winner
+        self._write(END, winner, _ENDS.index(result.end))
+        self.game.recorder = None
+        self.game = None
+
+
+class LoggedGame:
+    """ a game of a log file, read from the memory map of the file
+    while the reader is open.
+    """
+    __slots__ = ('_map', 'start', 'stop', 'result')
+
+    def __init__(self, map, start: int, stop: int, result: GameResult):
+        self._map = map
+        self.start = start
+        self.stop = stop
+        self.result = result
+
+    def records(self) -> Iterator[tuple]:
+        """ yields the (type, seat, a, b) records of the game.
+        """
+        for offset in range(self.start, self.stop, RECORD_SIZE):
+            yield _RECORD.unpack_from(self._map, offset)
+
+    def replay(self, turn: int=None, player_classes: Sequence[type]=None) -> HeadlessGame:
+        """ rebuilds the game as it was after `turn` turns, at its end by
+        default, with the recorded classes of the players unless
+        `player_classes` is given. The game can be played on from there.
+        """
+        game, players = None, None
+        deck_card, thrown_cards = None, None
+        nb_turns = 0
+        records = self.records()
+        for type, seat, a, b in records:
+            if type == START:
+                paths = [_read_path(records) for _ in range(seat)]
+                if player_classes is None:
+                    player_classes = [import_class(path) for path in paths]
+                game = _empty_game(a, _RULES[b & ~KOBO_ROUND], player_classes, bool(b & KOBO_ROUND))
+                players = game.players
+            elif type == HAND:
+                hand = players[seat].cards
+                hand.cards.append(a)
+                hand.discover(len(hand) - 1, bool(b))
+            elif type == DECK:
+                game.deck.append(a)
+            elif type == THROWN:
+                game.thrown_deck.append(a)
+            elif type == KOBO:
+                players[seat].is_kobo = True
+            elif type == SNAPSHOT_END:
+                game.counter = CardCounter.from_cards(game.deck, game.thrown_deck)
+                if turn == 0:
+                    return game
+            elif type == DRAW:
+                deck_card = game.pop_card()
+            elif type == RESHUFFLE:
+                game.deck, game.thrown_deck = [], []
+                game.counter.reshuffle()
+            elif type == SUBSTITUTE:
+                thrown_cards = players[seat]._substitute_card(a, deck_card)
+            elif type == THROW:
+                thrown_cards = players[seat]._do_not_substitute_card(deck_card)
+            elif type == JACK:
+                players[seat]._trigger_jack_effect(b & 0xf, b >> 4, players[a].cards)
+            elif type == QUEEN:
+                players[seat]._trigger_queen_effect(a)
+            elif type == END_TURN:
+                # the duplicates thrown by the other players follow, already thrown here
+                game.end_turn(players[seat], thrown_cards)
+                nb_turns += 1
+                if nb_turns == turn:
+                    return game
+        return game
+
+
+def _empty_game(nb_cards: int, empty_deck_rule: EmptyDeckRule, player_classes: Sequence[type], kobo_round: bool) -> HeadlessGame:
+    game = HeadlessGame(
+        nb_cards=nb_cards, empty_deck_rule=empty_deck_rule, player_classes=player_classes, kobo_round=kobo_round
+    )
+    for player in game.players:
+        player.set_cards([])
+    game.deck.clear()
+    game.thrown_deck.clear()
+    return game
+
+
+def _read_path(records: Iterator[tuple]) -> str:
+    _, _, length, _ = next(records)
+    path = bytearray()
+    while len(path) < length:
+        path += bytes(next(records)[1:])
+    return path[:length].decode()
+
+
+def class_path(cls: type) -> str:
+    """ returns the `module:qualname` of `cls`, or of its nearest base that
+    can be imported back when `cls` is built at run time, like the classes
+    of `AIPlayer.with_params`.
+    """
+    for base in cls.__mro__:
+        path = f'{base.__module__}:{base.__qualname__}'
+        try:
+            if import_class(path) is base:
+                return path
+        except (ImportError, AttributeError):
+            pass
+    raise ValueError(f'{cls} has no base that can be imported')
+
+
+def import_class(path: str) -> type:
+    module, qualname = path.split(':')
+    cls = importlib.import_module(module)
+    for name in qualname.split('.'):
+        cls = getattr(cls, name)
+    return cls
+
+
+class GameLogReader:
+    """ memory maps a log file written by `GameLogWriter`.
+    `games` reads the file lazily, so logs much larger than the memory
+    can be analyzed.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(_MAGIC)] != _MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a game log')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def games(self) -> Iterator[LoggedGame]:
+        """ yields the games of the log, a game still being written is skipped.
+        """
+        start, nb_turns = None, 0
+        size = len(self._map) - (len(self._map) - len(_MAGIC)) % RECORD_SIZE
+        for offset in range(len(_MAGIC), size, RECORD_SIZE):
+            type, seat, a, _ = _RECORD.unpack_from(self._map, offset)
+            if type == START:
+                start, nb_turns = offset, 0
+            elif type == END_TURN:
+                nb_turns += 1
+            elif type == END and start is not None:
+                winner = None if seat == NO_WINNER else seat
+                result = GameResult(winner, nb_turns, _ENDS[a])
+                yield LoggedGame(self._map, start, offset + RECORD_SIZE, result)
+                start = None
+
+
+def read_games(paths: Sequence[str]) -> Iterator[LoggedGame]:
+    """ yields the games of every log file in `paths`, each game is valid
+    until the next file is opened.
+    """
+    for path in paths:
+        with GameLogReader(path) as reader:
+            yield from reader.games()
+
+
+def record_games(path: str, n: int, seed=None, **game_kwargs) -> List[GameResult]:
+    """ plays `n` headless games like `headless.run_games`
+    and appends them to the log at `path`.
+    """
+    results = []
+    with GameLogWriter(path) as log:
+        for game_seed in game_seeds(n, seed):
+            game = HeadlessGame(seed=game_seed, **game_kwargs)
+            log.record(game)
+            results.append(game.play())
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+    from collections import Counter
+    parser = argparse.ArgumentParser(description='records headless games or summarizes game logs.')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('-n', type=int, default=None, help='records this number of games to the first path')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.n is not None:
+        record_games(args.paths[0], args.n, seed=args.seed)
+    ends, nb_games, nb_turns = Counter(), 0, 0
+    for game in read_games(args.paths):
+        nb_games += 1
+        nb_turns += game.result.nb_turns
+        ends[game.result.end.value] += 1
+    print(f'{nb_games} games, {nb_turns} turns, {dict(ends)}')
@@ -0,0 +1,147 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import List, Optional, Sequence
+import random
+
+from kobo_ai import AIPlayer, DeckExhausted, EmptyDeckRule, Game
+
+
+class GameEnd(Enum):
+    VICTORY = 'victory'
+    DECK_EXHAUSTED = 'deck_exhausted'
+    MAX_TURNS = 'max_turns'
+    KOBO = 'kobo'
+
+
+@dataclass
+class GameResult:
+    winner: Optional[int]
+    nb_turns: int
+    end: GameEnd
+
+
+class HeadlessGame(Game):
+    """ a game between `nb_players` AI players, without any terminal I/O.
+    `player_classes` gives the AI class of each seat, `AIPlayer` by default.
+    With `kobo_round`, the first player calling kobo gives every other
+    player one last turn, then the game ends with `GameEnd.KOBO` and the
+    hands are left to be scored, see `match.score_rounds`.
+    """
+    # seat of the first player who called kobo in the last game played
+    kobo_caller = None
+
+    def __init__(
+        self,
+        nb_players=2,
+        nb_cards=4,
+        seed=None,
+        empty_deck_rule: EmptyDeckRule=EmptyDeckRule.END_GAME,
+        max_turns=1000,
+        player_classes: Sequence[type]=None,
+        kobo_round=False
+        ):
+        if empty_deck_rule == EmptyDeckRule.EXIT:
+            raise ValueError('a headless game can not exit the process when the deck is empty')
+        if player_classes is None:
+            player_classes = [AIPlayer] * nb_players
+        self.player_classes = player_classes
+        self.nb_players = len(player_classes)
+        self.max_turns = max_turns
+        self.kobo_round = kobo_round
+        super().__init__(nb_cards=nb_cards, seed=seed, empty_deck_rule=empty_deck_rule, verbose=False)
+
+    def _init_players(self):
+        self.players = [player_class(self) for player_class in self.player_classes]
+
+    def play(self, turn: int=None) -> GameResult:
+        """ plays the game until a player has no card left, the last turn
+        after a kobo, the deck is exhausted or `max_turns` is reached.
+        `turn` is the seat of the first player, drawn at random by default.
+        """
+        result = self._play(turn)
+        if self.recorder is not None:
+            self.recorder.end(result)
+        return result
+
+    def _play(self, turn: int=None) -> GameResult:
+        if turn is None:
+            turn = self.rng.randrange(self.nb_players)
+        self.kobo_caller = None
+        nb_last_turns = 0
+        for nb_turns in range(self.max_turns):
+            player = self.players[turn]
+            try:
+                deck_card = self.pop_card()
+            except DeckExhausted:
+                return GameResult(None, nb_turns, GameEnd.DECK_EXHAUSTED)
+            thrown_cards = player.play(deck_card)
+            winner = self.end_turn(player, thrown_cards)
+            if winner is not None:
+                winner.win()
+                return GameResult(self.players.index(winner), nb_turns + 1, GameEnd.VICTORY)
+            if self.kobo_round:
+                if self.kobo_caller is None and player.is_kobo:
+                    self.kobo_caller = turn
+                    nb_last_turns = self.nb_players
+                if self.kobo_caller is not None:
+                    nb_last_turns -= 1
+                    if nb_last_turns == 0:
+                        return GameResult(None, nb_turns + 1, GameEnd.KOBO)
+            turn = (turn + 1) % self.nb_players
+        return GameResult(None, self.max_turns, GameEnd.MAX_TURNS)
+
+    def end_turn(self, player, thrown_cards):
+        """ throws the cards played by `player` and their duplicates.
+        Returns the winner or None.
+        """
+        if self.recorder is not None:
+            self.recorder.end_turn(player)
+        self.throw_cards(thrown_cards)
+        self._throw_duplicate_cards(thrown_cards, player)
+        for tracker in self.trackers:
+            tracker.observe_turn(player, thrown_cards)
+        return player if len(player.cards) == 0 else self.winner()
+
+
+def game_seeds(n: int, seed=None) -> List[int]:
+    """ returns the seeds of `n` games, each game gets its own random stream.
+    """
+    rng = random.Random(seed)
+    return [rng.getrandbits(64) for _ in range(n)]
+
+
+def play_games(seeds: Sequence[int], **game_kwargs) -> List[GameResult]:
+    """ plays one headless game per seed, `game_kwargs` are given to `HeadlessGame`.
+    The same game is reset for every seed.
+    """
+    results = []
+    game = None
+    for seed in seeds:
+        if game is None:
+            game = HeadlessGame(seed=seed, **game_kwargs)
+        else:
+            game.reset(seed)
+        results.append(game.play())
+    return results
+
+
+def run_games(
+    n: int,
+    seed=None,
+    nb_players=2,
+    nb_cards=4,
+    empty_deck_rule: EmptyDeckRule=EmptyDeckRule.END_GAME,
+    max_turns=1000,
+    player_classes: Sequence[type]=None
+    ) -> List[GameResult]:
+    """ plays `n` headless games and returns their results.
+    The same `seed` always gives the same results.
+    """
+    return play_games(
+        game_seeds(n, seed),
+        nb_players=nb_players,
+        nb_cards=nb_cards,
+        empty_deck_rule=empty_deck_rule,
+        max_turns=max_turns,
+        player_classes=player_classes,
+    )
@@ -0,0 +1,19 @@
+""" the engine of the kobo card game: cards, rules and players.
+Importing it has no side effect and leaves the terminal rendering
+unloaded, `python -m kobo_ai` plays a game in the terminal.
+"""
+from kobo_ai.cards import (
+    CARD_FORMATS, CARD_RANKS, CARD_SUITS, DECK_SIZE, FULL_DECK, GREAT_RANKS, JACK, NB_RANKS, NB_SUITS, QUEEN,
+    Card, CardCounter, Hand, Rank, Suit, card_id
+)
+from kobo_ai.game import DeckExhausted, EmptyDeckRule, Game, PlayerI
+from kobo_ai.player import CommandKeys, Player, PlayerInput
+from kobo_ai.ai import DEFAULT_AI_PARAMS, THROW_DECK_CARD, AIParams, AIPlayer, get_first_card_index, is_a_great_card
+
+
+def __getattr__(name: str):
+    # the terminal rendering is imported on first use
+    if name == 'Colors':
+        from kobo_ai.terminal import Colors
+        return Colors
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,11 @@
+import argparse
+
+from kobo_ai.game import EmptyDeckRule, Game
+
+parser = argparse.ArgumentParser(prog='python -m kobo_ai', description='plays kobo against the AI in the terminal.')
+parser.add_argument('--nb-cards', type=int, default=4)
+parser.add_argument('--seed', type=int, default=None)
+parser.add_argument('--empty-deck-rule', choices=[r.value for r in EmptyDeckRule], default=EmptyDeckRule.EXIT.value)
+args = parser.parse_args()
+
+Game(nb_cards=args.nb_cards, seed=args.seed, empty_deck_rule=EmptyDeckRule(args.empty_deck_rule)).launch()
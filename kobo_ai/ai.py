@@ -0,0 +1,266 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import List
+import operator
+
+from kobo_ai.cards import CARD_FORMATS, CARD_RANKS, GREAT_RANKS, JACK, QUEEN, Hand
+from kobo_ai.game import PlayerI
+from kobo_ai.tracing import Tracer
+
+THROW_DECK_CARD = -1
+
+def is_a_great_card(rank: int) -> bool:
+    return rank in GREAT_RANKS
+
+def get_first_card_index(ranks: List[int], rank: int) -> int:
+    return ranks.index(rank) if rank in ranks else -1
+
+@dataclass(frozen=True)
+class AIParams:
+    """ the knobs of `AIPlayer`.
+    `great_ranks` are the ranks the AI keeps and calls kobo with,
+    a rank is scarce when its number of cards left in the deck is in
+    `scarce_counts`, scarce cards are thrown first. With `kobo_max_points`
+    the AI also calls kobo when its hand, all discovered, is worth at most
+    this many points. With `jack_only_on_kobo` jacks are only used once
+    an opponent called kobo.
+    """
+    great_ranks: frozenset = GREAT_RANKS
+    scarce_counts: tuple = (1, 2)
+    kobo_max_points: int = None
+    jack_only_on_kobo: bool = True
+
+DEFAULT_AI_PARAMS = AIParams()
+
+class AIPlayer(PlayerI):
+    __slots__ = ()
+
+    # see `with_params`
+    params = DEFAULT_AI_PARAMS
+    # shared by every AI player of the process, see `decision_cache.DecisionCache`,
+    # only used with the default params
+    decision_cache = None
+    # branch counters and events of every AI player, see `kobo_ai.tracing.Tracer`
+    tracer = Tracer()
+    # solves the plays of the late game, see `endgame.EndgameSolver`
+    endgame_solver = None
+
+    def __init__(self, game):
+        super().__init__(game)
+
+    @classmethod
+    def with_params(cls, params: AIParams) -> type:
+        """ returns a subclass playing with `params`.
+        """
+        return type(cls.__name__, (cls,), dict(__slots__=(), params=params))
+
+    def decision_view(self, deck_card: int):
+        """ returns everything the decision of the turn depends on:
+        the ranks of the cards in hand (0 for hidden cards), the rank of the
+        deck card, whether an opponent called kobo, and a mask of the ranks
+        with only 1 or 2 cards left in the deck (`AIParams.scarce_counts`).
+        """
+        ranks = tuple(CARD_RANKS[c] if (self.cards.discovered >> i) & 1 else 0 for i, c in enumerate(self.cards.cards))
+        deck_rank = CARD_RANKS[deck_card]
+        opponent_is_kobo = any(p.is_kobo for p in self.game.opponents(self))
+        scarce_ranks = 0
+        scarce_counts = self.params.scarce_counts
+        for r in {*ranks, deck_rank}:
+            if r != 0 and self.game.counter.in_deck(r) in scarce_counts:
+                scarce_ranks |= 1 << r
+        return ranks, deck_rank, opponent_is_kobo, scarce_ranks
+
+    def decide(self, view):
+        """ returns the index of the card to substitute, or `THROW_DECK_CARD`,
+        and whether to call kobo.
+        """
+        ranks_in_hand, deck_rank, opponent_is_kobo, scarce_ranks = view
+        great_ranks = self.params.great_ranks
+
+        known_indexes = [i for i, r in enumerate(ranks_in_hand) if r != 0]
+        hidden_indexes = [i for i, r in enumerate(ranks_in_hand) if r == 0]
+        ranks = [ranks_in_hand[i] for i in known_indexes]
+        hidden_card_index = hidden_indexes[0] if len(hidden_indexes) > 0 else -1
+
+        # handle kobo
+        if opponent_is_kobo:
+            if deck_rank == JACK: # deck card is jack
+                self.tracer.branch('JACK DECK')
+                return THROW_DECK_CARD, False
+            else:
+                jack_index = get_first_card_index(ranks, JACK)
+                if jack_index != -1: # found a jack in cards
+                    self.tracer.branch('JACK CARDS')
+                    return known_indexes[jack_index], False
+        
+        # handle queen
+        if deck_rank == QUEEN:
+            self.tracer.branch('QUEEN DECK')
+            return THROW_DECK_CARD, False
+        else:
+            queen_index = get_first_card_index(ranks, QUEEN)
+            if queen_index != -1: # found a queen
+                if hidden_card_index != -1: # found 1 hidden card
+                    self.tracer.branch('QUEEN CARDS')
+                    return known_indexes[queen_index], False
+
+        # handle hidden cards discover
+        if hidden_card_index != -1: # found a hidden card
+            self.tracer.branch('HIDDEN')
+            return hidden_card_index, False
+        
+        # handle every cards are great
+        ranks_with_deck_card = ranks + [deck_rank]
+        best_hit_index = self._get_best_hit_index(ranks_with_deck_card, scarce_ranks, len(hidden_indexes))
+        best_hit_rank = ranks_with_deck_card[best_hit_index]
+        if best_hit_rank in great_ranks: # all cards are great
+            best_hit_index = self._get_worst_combinaison_of_cards_index(ranks_with_deck_card)
+            if best_hit_index == len(ranks_with_deck_card) - 1: # best hit is the deck card
+                self.tracer.branch('KOBO DECK')
+                return THROW_DECK_CARD, True
+            else:
+                self.tracer.branch('KOBO CARDS')
+                return best_hit_index, True
+
+        # handle deck card is a card we already have
+        deck_card_index = get_first_card_index(ranks, deck_rank)
+        if deck_card_index != -1 and deck_rank not in great_ranks:
+            self.tracer.branch('ALREADY HAVE THIS CARD')
+            return THROW_DECK_CARD, self._calls_kobo(ranks_with_deck_card, deck_rank)
+
+        # default turn
+        if best_hit_index == len(ranks_with_deck_card) - 1: # best hit is the deck card
+            self.tracer.branch('CLASSIC DECK')
+            return THROW_DECK_CARD, self._calls_kobo(ranks_with_deck_card, deck_rank)
+        else:
+            self.tracer.branch('CLASSIC CARDS')
+            return best_hit_index, self._calls_kobo(ranks_with_deck_card, ranks_with_deck_card[best_hit_index])
+
+    def _get_best_hit_index(self, ranks: List[int], scarce_ranks: int, nb_hidden: int, rank_to_ignore: int=None) -> int:
+        """ returns the index of the card with the worst value.
+        Does not take into account the duplicates.
+        """
+        great_ranks = self.params.great_ranks
+        worst, worst_idx = ranks[0], 0
+        for i in range(1, len(ranks)):
+            r = ranks[i]
+            # if we have a queen and we also have 1 or more hidden cards
+            if r == QUEEN and nb_hidden >= 1:
+                return i
+            # if only 1 or 2 card are remaining in the deck
+            if (scarce_ranks >> r) & 1 and r not in great_ranks:
+                return i
+            # get rank with highest value
+            if r > worst and r != rank_to_ignore:
+                worst, worst_idx = r, i
+        return worst_idx
+
+    def _calls_kobo(self, ranks: List[int], thrown_rank: int) -> bool:
+        """ whether the hand left once `thrown_rank` is thrown is worth
+        at most `AIParams.kobo_max_points`.
+        """
+        max_points = self.params.kobo_max_points
+        return max_points is not None and sum(r for r in ranks if r != thrown_rank) <= max_points
+
+    def _get_worst_combinaison_of_cards_index(self, ranks: List[int]) -> int:
+        """ returns the index of the card which when played
+        will lose the most points. Takes into account the duplicate
+        cards which will lose more points.
+        """
+        card_values = defaultdict(int)
+        for r in ranks:
+            card_values[r] += r
+        max_combinaison_rank = max(card_values.items(), key=operator.itemgetter(1))[0]
+        if self.tracer.sink.enabled:
+            self.tracer.emit('worst_combinaison', values=dict(card_values), rank=max_combinaison_rank)
+        return ranks.index(max_combinaison_rank)
+
+    def _jack_target_index(
+        self,
+        cards: Hand, 
+        do_not_choose_indexes: List[int]=[]
+        ) -> int:
+        """ returns a pseudo random index from list of cards;
+        some `do_not_choose_indexes` can be provide to avoid 
+        to peek same card multiple times.
+        """
+        if len(cards) == 0:
+            return 0
+        for i in range(len(cards)):
+            if i not in do_not_choose_indexes:
+                return i
+        return self.game.rng.randrange(len(cards))
+
+    def _apply_jack_effect(self, thrown_cards: List[int], other_player_cards: Hand, opponent_is_kobo: bool):
+        """ apply effect on all jack cards.
+        """
+        cards = self.cards
+        already_peeked_indexes = []
+        for c in thrown_cards:
+            if len(cards) == 0 or len(other_player_cards) == 0:
+                break
+            # only use the jack when the other is kobo
+            if CARD_RANKS[c] == JACK and (opponent_is_kobo or not self.params.jack_only_on_kobo):
+                random_index = self._jack_target_index(other_player_cards, already_peeked_indexes)
+                already_peeked_indexes.append(random_index)
+                worst_card_idx = self._get_worst_combinaison_of_cards_index(cards.ranks())
+                self._trigger_jack_effect(worst_card_idx, random_index, other_player_cards)
+
+    def _apply_queen_effect(self, thrown_cards: List[int]):
+        """ apply effect on all queen cards.
+        """
+        cards = self.cards
+        for c in thrown_cards:
+            if CARD_RANKS[c] == QUEEN:
+                hidden_cards = cards.hidden_indexes()
+                if len(hidden_cards) > 0:
+                    i = hidden_cards[0]
+                    self.tracer.emit('discover', card=CARD_FORMATS[cards[i]])
+                    self._trigger_queen_effect(i)
+
+    def _check_kobo(self) -> bool:
+        for r in self.cards.ranks():
+            if r not in self.params.great_ranks:
+                return False
+        return True
+
+    def play(self, deck_card):
+        start = self.tracer.start()
+        view = self.decision_view(deck_card)
+        opponent_is_kobo = view[2]
+        if self.decision_cache is None or self.params is not DEFAULT_AI_PARAMS:
+            card_index, call_kobo = self.decide(view)
+        else:
+            card_index, call_kobo = self.decision_cache.get_or_decide(view, self.decide)
+        if self.endgame_solver is not None:
+            solved_index = self.endgame_solver.solve(self.game, self, deck_card, card_index)
+            if solved_index is not None:
+                self.tracer.replace_branch('ENDGAME')
+                card_index = solved_index
+        self.tracer.decision(start, card_index, call_kobo)
+
+        if call_kobo:
+            self.is_kobo = True
+        if card_index == THROW_DECK_CARD:
+            thrown_cards = self._do_not_substitute_card(deck_card)
+        else:
+            thrown_cards = self._substitute_card(card_index, deck_card)
+        self._apply_jack_effect(thrown_cards, self.game.next_opponent(self).cards, opponent_is_kobo)
+        self._apply_queen_effect(thrown_cards)
+        if self._check_kobo():
+            self.is_kobo = True
+        return thrown_cards
+        
+
+    def render_cards(self, frame, visible_cards: List[int]=[]):
+        from kobo_ai.terminal import Colors
+        frame.line(Colors.BOLD)
+        frame.line(Colors.FAIL)
+        frame.line('AI cards')
+        super().render_cards(frame, visible_cards=visible_cards)
+        frame.line(Colors.ENDC)
+
+    def render_deck_card(self, frame, card: int):
+        from kobo_ai.terminal import Colors
+        frame.line(Colors.FAIL)
+        super().render_deck_card(frame, card)
@@ -0,0 +1,209 @@
+from enum import Enum
+from typing import List
+
+class Rank(Enum):
+    ACE = 1
+    TWO = 2
+    THREE = 3
+    FOUR = 4
+    FIVE = 5
+    SIX = 6
+    SEVEN = 7 
+    EIGHT = 8
+    NINE = 9
+    TEN = 10
+    JACK = 11
+    QUEEN = 12
+    KING = 13
+
+    def format(self):
+        traductions = [str(i+1) for i in range(10)] + ['J', 'Q', 'K']
+        return traductions[self.value-1]
+
+class Suit(Enum):
+    CLUB = 1
+    DIAMOND = 2
+    HEART = 3
+    SPADE = 4
+
+NB_RANKS = len(Rank)
+NB_SUITS = len(Suit)
+DECK_SIZE = NB_RANKS * NB_SUITS
+
+# a card is an int in [0, DECK_SIZE), these tables give its rank and suit values
+CARD_RANKS = tuple(i % NB_RANKS + 1 for i in range(DECK_SIZE))
+CARD_SUITS = tuple(i // NB_RANKS + 1 for i in range(DECK_SIZE))
+FULL_DECK = tuple(range(DECK_SIZE))
+CARD_FORMATS = tuple(Rank(r).format() for r in CARD_RANKS)
+
+JACK = Rank.JACK.value
+QUEEN = Rank.QUEEN.value
+GREAT_RANKS = frozenset((Rank.ACE.value, Rank.TWO.value, Rank.TEN.value))
+
+def card_id(rank: Rank, suit: Suit) -> int:
+    return (suit.value - 1) * NB_RANKS + rank.value - 1
+
+class Card:
+    """ display layer on top of an int card.
+    """
+    __slots__ = ('id',)
+
+    def __init__(self, rank: Rank, suit: Suit):
+        self.id = card_id(rank, suit)
+
+    @classmethod
+    def from_id(cls, id: int):
+        card = cls.__new__(cls)
+        card.id = id
+        return card
+
+    @property
+    def rank(self) -> Rank:
+        return Rank(CARD_RANKS[self.id])
+
+    @property
+    def suit(self) -> Suit:
+        return Suit(CARD_SUITS[self.id])
+
+    @property
+    def format(self) -> str:
+        return CARD_FORMATS[self.id]
+
+    def __repr__(self):
+        return '{}'.format(self.format)
+
+    def __eq__(self, obj):
+        return isinstance(obj, Card) and CARD_RANKS[self.id] == CARD_RANKS[obj.id]
+
+    def __hash__(self):
+        return hash(self.id)
+
+class Hand:
+    """ cards of a player as a bytearray of card ids, with a parallel
+    bitmask where bit `i` is set when the card at index `i` is discovered.
+    """
+    __slots__ = ('cards', 'discovered')
+
+    def __init__(self, cards=(), discovered=0):
+        self.cards = bytearray(cards)
+        self.discovered = discovered
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+    def __getitem__(self, index: int) -> int:
+        return self.cards[index]
+
+    def __repr__(self):
+        return repr([CARD_FORMATS[c] for c in self.cards])
+
+    def copy(self) -> 'Hand':
+        return Hand(self.cards, self.discovered)
+
+    def rank(self, index: int) -> int:
+        return CARD_RANKS[self.cards[index]]
+
+    def ranks(self) -> List[int]:
+        return [CARD_RANKS[c] for c in self.cards]
+
+    def is_discovered(self, index: int) -> bool:
+        return (self.discovered >> index) & 1 == 1
+
+    def discover(self, index: int, yes: bool=True):
+        if yes:
+            self.discovered |= 1 << index
+        else:
+            self.discovered &= ~(1 << index)
+
+    def hidden_indexes(self) -> List[int]:
+        return [i for i in range(len(self.cards)) if not (self.discovered >> i) & 1]
+
+    def visible(self) -> List[int]:
+        return [c for i, c in enumerate(self.cards) if (self.discovered >> i) & 1]
+
+    def set(self, index: int, card: int, discovered: bool):
+        self.cards[index] = card
+        self.discover(index, discovered)
+
+    def remove_ranks(self, ranks, discovered_only: bool=False) -> List[int]:
+        """ removes every card with a rank in `ranks` and returns them.
+        Hidden cards are kept when `discovered_only` is set.
+        The kept cards are moved in place, without a new buffer.
+        """
+        removed = []
+        cards = self.cards
+        nb_kept = 0
+        discovered = 0
+        for i, c in enumerate(cards):
+            is_discovered = (self.discovered >> i) & 1
+            if CARD_RANKS[c] in ranks and (is_discovered or not discovered_only):
+                removed.append(c)
+            else:
+                discovered |= is_discovered << nb_kept
+                cards[nb_kept] = c
+                nb_kept += 1
+        if nb_kept < len(cards):
+            del cards[nb_kept:]
+        self.discovered = discovered
+        return removed
+
+class CardCounter:
+    """ running number of cards of each rank in the deck and in the thrown pile,
+    indexed by rank value. Every query is O(1).
+    """
+    __slots__ = ('deck_counts', 'thrown_counts')
+
+    def __init__(self):
+        self.deck_counts = [0] + [NB_SUITS] * NB_RANKS
+        self.thrown_counts = [0] * (NB_RANKS + 1)
+
+    def reset(self):
+        """ every card back in the deck.
+        """
+        for r in range(1, NB_RANKS + 1):
+            self.deck_counts[r] = NB_SUITS
+            self.thrown_counts[r] = 0
+
+    @classmethod
+    def from_cards(cls, deck: List[int], thrown_deck: List[int]) -> 'CardCounter':
+        counter = cls()
+        counter.deck_counts = [0] * (NB_RANKS + 1)
+        for c in deck:
+            counter.deck_counts[CARD_RANKS[c]] += 1
+        counter.throw(thrown_deck)
+        return counter
+
+    def copy(self) -> 'CardCounter':
+        counter = CardCounter.__new__(CardCounter)
+        counter.deck_counts = self.deck_counts.copy()
+        counter.thrown_counts = self.thrown_counts.copy()
+        return counter
+
+    def draw(self, card: int):
+        self.deck_counts[CARD_RANKS[card]] -= 1
+
+    def throw(self, cards: List[int]):
+        for c in cards:
+            self.thrown_counts[CARD_RANKS[c]] += 1
+
+    def reshuffle(self):
+        """ the thrown pile goes back into the deck.
+        """
+        for r in range(1, NB_RANKS + 1):
+            self.deck_counts[r] += self.thrown_counts[r]
+            self.thrown_counts[r] = 0
+
+    def in_deck(self, rank: int) -> int:
+        return self.deck_counts[rank]
+
+    def nb_thrown(self, rank: int) -> int:
+        return self.thrown_counts[rank]
+
+    def unseen(self, rank: int, hand: Hand) -> int:
+        """ number of cards of `rank` that neither are in the thrown pile
+        nor discovered in `hand`: in the deck or hidden in any hand.
+        """
+        return NB_SUITS - self.thrown_counts[rank] - sum(1 for c in hand.visible() if CARD_RANKS[c] == rank)
@@ -0,0 +1,305 @@
+from enum import Enum
+from typing import List
+import random
+
+from kobo_ai.cards import CARD_FORMATS, CARD_RANKS, FULL_DECK, CardCounter, Hand
+
+class EmptyDeckRule(Enum):
+    EXIT = 'exit'
+    END_GAME = 'end_game'
+    RESHUFFLE = 'reshuffle'
+
+class DeckExhausted(Exception):
+    pass
+
+class Game:
+    # set by `game_log.GameLogWriter.record` to log every event of the game
+    recorder = None
+    # `belief.BeliefTracker`s told about the end of every turn
+    trackers = ()
+    # `terminal.Frame` of the turn being played by `launch`
+    frame = None
+    # seed of the current deal, see `player_seed`
+    seed = None
+
+    def __init__(
+        self,
+        nb_cards=4,
+        seed=None,
+        empty_deck_rule: EmptyDeckRule=EmptyDeckRule.EXIT,
+        verbose=True
+        ):
+        self.nb_cards = nb_cards
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.empty_deck_rule = empty_deck_rule
+        self.verbose = verbose
+        self._init_players()
+        self._init_game()
+        self._displayed_cards = [0, 1]
+        self._should_display_cards = True
+
+    def log(self, msg: str):
+        if self.verbose:
+            self._show(msg)
+
+    def _show(self, msg: str):
+        if self.frame is not None:
+            self.frame.line(msg)
+        else:
+            print(msg)
+
+    def pop_card(self):
+        if len(self.deck) == 0:
+            self._handle_empty_deck()
+        card = self.deck.pop()
+        self.counter.draw(card)
+        if self.recorder is not None:
+            self.recorder.draw(card)
+        return card
+
+    def _handle_empty_deck(self):
+        """ applies `empty_deck_rule` once the deck runs out.
+        Raises `DeckExhausted` when the game can't go on.
+        """
+        if self.empty_deck_rule == EmptyDeckRule.EXIT:
+            print('The deck is empty!')
+            exit()
+        if self.empty_deck_rule == EmptyDeckRule.RESHUFFLE and len(self.thrown_deck) > 0:
+            self.deck, self.thrown_deck = self.thrown_deck, []
+            self.counter.reshuffle()
+            self.rng.shuffle(self.deck)
+            if self.recorder is not None:
+                self.recorder.reshuffle(self.deck)
+            return
+        raise DeckExhausted()
+
+    def launch(self):
+        from kobo_ai.terminal import Frame
+        player, ai = self.player, self.ai_player
+        player_turn = bool(self.rng.randint(0, 1))
+        thrown_cards: List[int]
+        # every turn is rendered in one frame, written once the turn is over
+        frame = self.frame = Frame()
+
+        while True:
+            deck_card = self.pop_card()
+            if player_turn:
+                # if self._should_display_cards:
+                #     player.display_cards(visible_cards=self._displayed_cards)
+                # player._display_deck_card(deck_card)
+                thrown_cards = player.play(deck_card)
+                self._displayed_cards = []
+            else:
+                ai.render_cards(frame)
+                ai.render_deck_card(frame, deck_card)
+                thrown_cards = ai.play(deck_card)
+            self.throw_cards(thrown_cards)
+            self._throw_duplicate_cards(thrown_cards, player if player_turn else ai)
+            for tracker in self.trackers:
+                tracker.observe_turn(player if player_turn else ai, thrown_cards)
+            frame.line(('PLAYER' if player_turn else 'AI') + ' PLAYS')
+            if not player_turn:
+                visible_cards = [CARD_FORMATS[c] for c in ai.cards.visible()]
+                frame.line(f'Visible cards: {visible_cards}')
+                frame.line(f'Cards: {ai.cards}')
+                frame.line(f'Kobo: {ai.is_kobo}')
+
+            player_turn = not player_turn
+            is_over = self._check_victory(player, ai)
+            frame.write()
+            if is_over:
+                break
+        self.frame = None
+
+    def _init_players(self):
+        from kobo_ai.ai import AIPlayer
+        from kobo_ai.player import Player
+        self.ai_player = AIPlayer(self)
+        self.player = Player(self)
+        self.players = [self.ai_player, self.player]
+
+    def _init_game(self):
+        self.thrown_deck = []
+        self.counter = CardCounter()
+        self.deck = list(FULL_DECK)
+        for player in self.players:
+            player.set_cards([])
+        self._deal()
+
+    def reset(self, seed=None):
+        """ starts a new game with the same players, as if the game was
+        created with `seed`. The deck, the thrown pile, the counter and the
+        hands are reused in place.
+        """
+        self.seed = seed
+        self.rng.seed(seed)
+        for player in self.players:
+            player.reset()
+        self.thrown_deck.clear()
+        self.counter.reset()
+        self.deck[:] = FULL_DECK
+        self._deal()
+
+    def _deal(self):
+        self.rng.shuffle(self.deck)
+        nb_discovered = min(2, self.nb_cards)
+        for player in self.players:
+            hand = player.cards
+            del hand.cards[:]
+            for _ in range(self.nb_cards):
+                hand.cards.append(self.pop_card())
+            hand.discovered = (1 << nb_discovered) - 1
+        for tracker in self.trackers:
+            tracker.reset()
+        # self.ai_player.set_cards([Card(Rank.ACE, Suit.CLUB), Card(Rank.NINE, Suit.CLUB), Card(Rank.FOUR, Suit.CLUB), Card(Rank.NINE, Suit.CLUB)])
+
+    def _check_victory(self, player, ai_player):
+        if len(player.cards) == 0:
+            player.win()
+            self._show('YOU WON')
+            return True
+        elif len(ai_player.cards) == 0:
+            ai_player.win()
+            self._show('THE AI WON')
+            return True
+        return False
+
+    def player_seed(self, name: str):
+        """ returns the seed of a random stream `name` of a player, derived
+        from the seed of the game so that drawing from it never changes the
+        deal, or None when the game is not seeded.
+        """
+        return None if self.seed is None else f'{self.seed}/{name}'
+
+    def winner(self):
+        """ returns the first player without any card left or None.
+        """
+        return next((p for p in self.players if len(p.cards) == 0), None)
+
+    def opponents(self, player):
+        return [p for p in self.players if p is not player]
+
+    def next_opponent(self, player):
+        """ returns the player playing right after `player`.
+        """
+        return self.players[(self.players.index(player) + 1) % len(self.players)]
+
+    def set_displayed_cards(self, cards: [int]):
+        self._displayed_cards = cards
+
+    def set_should_display_cards(self, should: bool):
+        self._should_display_cards = should
+    
+    def nb_occurences_in_deck(self, rank: int):
+        return self.counter.in_deck(rank)
+
+    def throw_cards(self, cards: List[int]):
+        self.thrown_deck += cards
+        self.counter.throw(cards)
+
+    def _throw_duplicate_cards(self, thrown_cards: List[int], player):
+        thrown_ranks = {CARD_RANKS[c] for c in thrown_cards}
+        for other_player in self.opponents(player):
+            duplicate_cards = other_player.cards.remove_ranks(thrown_ranks)
+            for c in duplicate_cards:
+                self.log(f'{CARD_FORMATS[c]} is a duplicate card!')
+                if self.recorder is not None:
+                    self.recorder.duplicate(other_player, c)
+            self.throw_cards(duplicate_cards)
+            # IMPORTANT  !!!  handle the effects of cards (queen or J if duplicate) use inheritance for methods
+
+
+class PlayerI:
+    __slots__ = ('game', 'victories', 'is_kobo', 'cards')
+
+    def __init__(self, game):
+        self.game = game
+        self.victories = 0
+        self.is_kobo = False
+
+    def set_cards(self, cards):
+        self.cards = Hand(cards)
+        for i in range(min(2, len(self.cards))):
+            self.cards.discover(i)
+
+    @property
+    def nb_cards(self):
+        return len(self.cards)
+
+    @property
+    def _hidden_cards(self):
+        return self.cards.hidden_indexes()
+
+    def win(self):
+        self.victories += 1
+
+    def reset(self):
+        """ called by `Game.reset` before the new deal.
+        """
+        self.is_kobo = False
+
+    def play(self, deck_card):
+        pass
+
+    def _apply_card_effects(self, thrown_cards):
+        pass
+
+    def _substitute_card(self, index: int, deck_card: int):
+        if self.game.recorder is not None:
+            self.game.recorder.substitute(self, index)
+        selected = self.cards.rank(index)
+        thrown_cards = [self.cards[index]]
+        self.cards.set(index, deck_card, discovered=True)
+
+        # remove all duplicates of the chosen card
+        thrown_cards += self.cards.remove_ranks((selected,), discovered_only=True)
+        return thrown_cards
+
+    def _do_not_substitute_card(self, deck_card: int):
+        if self.game.recorder is not None:
+            self.game.recorder.throw(self)
+        thrown_cards = [deck_card]
+        thrown_cards += self.cards.remove_ranks((CARD_RANKS[deck_card],), discovered_only=True)
+        return thrown_cards
+
+    def render_cards(self, frame, visible_cards: List[int]=[]):
+        """ adds the cards to `frame`, a `terminal.Frame`.
+        """
+        from kobo_ai.terminal import wrap_str_in_stars
+        cards = ' '.join([CARD_FORMATS[c] for c in self.cards])
+        frame.line(wrap_str_in_stars(cards))
+
+    def render_deck_card(self, frame, card: int):
+        from kobo_ai.terminal import Colors, wrap_str_in_stars
+        frame.line('New card')
+        frame.line(wrap_str_in_stars(CARD_FORMATS[card]) + Colors.ENDC)
+
+    def display_cards(self, visible_cards: List[int]=[]):
+        from kobo_ai.terminal import Frame
+        frame = Frame()
+        self.render_cards(frame, visible_cards=visible_cards)
+        frame.write()
+
+    def _display_deck_card(self, card: int):
+        from kobo_ai.terminal import Frame
+        frame = Frame()
+        self.render_deck_card(frame, card)
+        frame.write()
+
+    def _trigger_queen_effect(self, card_index: int):
+        if self.game.recorder is not None:
+            self.game.recorder.queen(self, card_index)
+        self.cards.discover(card_index)
+
+    def _trigger_jack_effect(
+        self, 
+        my_card_index: int, 
+        other_card_index: int,
+        other_cards: Hand
+        ):
+        if self.game.recorder is not None:
+            self.game.recorder.jack(self, my_card_index, other_card_index, other_cards)
+        my_card = self.cards[my_card_index]
+        self.cards.set(my_card_index, other_cards[other_card_index], discovered=False)
+        other_cards.set(other_card_index, my_card, discovered=False)
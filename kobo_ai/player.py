@@ -0,0 +1,153 @@
+from enum import Enum
+from typing import List
+
+from kobo_ai.cards import CARD_RANKS, JACK, QUEEN
+from kobo_ai.game import PlayerI
+
+class CommandKeys(Enum):
+    QuitKey = 'Q'
+    KoboKey = 'K'
+
+class PlayerInput:
+    def __init__(self):
+        self.is_index = False
+        self.is_command = False
+        self.is_kobo = False
+        self.is_quit_key = False
+        self.value = ''
+
+    def input_loop(self, nb_cards, msg='', accept_indexes=False, accept_commands=False) -> int:
+        """ loop asking the user to enter an answer.
+        """
+        while not self.parse(self._input(msg), nb_cards, accept_indexes, accept_commands):
+            print(self._invalid_input_msg(nb_cards))
+
+    def parse(self, value: str, nb_cards, accept_indexes=False, accept_commands=False) -> bool:
+        """ reads an answer of the user, returns whether it is valid.
+        """
+        self.__init__()
+        self.value = value
+        if (accept_indexes and accept_commands and not self._is_correct(nb_cards)) \
+            or (accept_indexes and not accept_commands and not self._check_card_index(nb_cards)) \
+            or (accept_commands and not accept_indexes and not self._check_command()):
+            return False
+        if self._check_kobo():
+            self.is_kobo = True
+        if self._check_card_index(nb_cards):
+            self.value = int(self.value) - 1
+            self.is_index = True
+        elif self._check_command():
+            self.is_command = True
+        if self.is_command and self.value == CommandKeys.QuitKey.value:
+            self.is_quit_key = True
+        return True
+
+    def _input(self, msg: str='') -> str:
+        return input(msg)
+
+    def _is_correct(self, nb_cards: int) -> bool:
+        """ returns wether the user's input is correct. 
+        In bound of the number of cards or a command.
+        """
+        return self._check_card_index(nb_cards) or self._check_command()
+
+    def _check_card_index(self, nb_cards: int) -> bool:
+        inp = self.value.split()
+        if not 1 <= len(inp) <= 2:
+            return False
+        if len(inp) == 2 and inp[1] != CommandKeys.KoboKey.value:
+            return False
+        inp = inp[0]
+        if not inp.isdecimal():
+            return False
+        inp = int(inp)
+        return 1 <= inp <= nb_cards
+
+    def _check_command(self) -> bool:
+        inp = self.value.split()
+        if not 1 <= len(inp) <= 2:
+            return False
+        if len(inp) == 2 and inp[1] != CommandKeys.KoboKey.value:
+            return False
+        cmd = inp[0]
+        return self._is_valid_command(cmd)
+
+    def _check_kobo(self) -> bool:
+        inp = self.value.split()
+        if len(inp) != 2:
+            return False
+        cmd = inp[1]
+        is_kobo = self._is_valid_command(cmd) and cmd == CommandKeys.KoboKey.value
+        if is_kobo:
+            self.value = inp[0]
+        return is_kobo
+
+    def _is_valid_command(self, cmd: str):
+        return isinstance(cmd, str) and cmd in set(item.value for item in CommandKeys)
+
+    def _invalid_input_msg(self, nb_cards: int):
+        digit_valid = [*range(1, nb_cards + 1)]
+        return 'Invalid command, valid commands: {}'.format( \
+            [*digit_valid, *list(map(lambda x: x.value, [*CommandKeys]))])
+
+
+class Player(PlayerI):
+    __slots__ = ()
+
+    def __init__(self, game):
+        super().__init__(game)
+
+    def play(self, deck_card):
+        inp = PlayerInput()
+        inp.input_loop(self.nb_cards, msg='Your turn: ', accept_indexes=True, accept_commands=True)
+        self.is_kobo = inp.is_kobo
+        return self._handle_input(inp, deck_card)
+
+    def _handle_input(self, inp: PlayerInput, deck_card: int):
+        if inp.is_index:
+            thrown_cards = self._substitute_card(inp.value, deck_card)
+            self._apply_card_effects(thrown_cards)
+            return thrown_cards
+        elif inp.is_command:
+            if inp.is_quit_key:
+                thrown_cards = self._do_not_substitute_card(deck_card)
+                self._apply_card_effects(thrown_cards)
+                return thrown_cards
+
+    def _apply_card_effects(self, thrown_cards):
+        self.game.set_should_display_cards(True)
+        opponent = self.game.next_opponent(self)
+        for card in thrown_cards:
+            if CARD_RANKS[card] == JACK:
+                self.display_cards()
+                inp = PlayerInput()
+                inp.input_loop(self.nb_cards, msg='Which card do you wanna switch? ', accept_indexes=True, accept_commands=True)
+                if inp.is_quit_key:
+                    break
+                my_card = inp.value
+                opponent.display_cards()
+                inp = PlayerInput()
+                inp.input_loop(opponent.nb_cards, msg='Which card do you wanna peek? ', accept_indexes=True)
+                other_card = inp.value
+                super()._trigger_jack_effect(my_card, other_card, opponent.cards)
+
+            if CARD_RANKS[card] == QUEEN:
+                inp = PlayerInput()
+                inp.input_loop(self.nb_cards, msg='Which card do you wanna see? ', accept_indexes=True, accept_commands=True)
+                if inp.is_quit_key:
+                    break
+                hidden_card_index = inp.value
+                super()._trigger_queen_effect(hidden_card_index)
+                self.display_cards(visible_cards=[hidden_card_index])
+                self.game.set_should_display_cards(False)
+
+    def render_cards(self, frame, visible_cards: List[int]=[]):
+        from kobo_ai.terminal import Colors
+        frame.line(Colors.BOLD)
+        frame.line('Your cards')
+        super().render_cards(frame, visible_cards=visible_cards)
+
+    def render_deck_card(self, frame, card: int):
+        from kobo_ai.terminal import Colors
+        frame.line(Colors.OKCYAN)
+        super().render_deck_card(frame, card)
@@ -0,0 +1,58 @@
+""" terminal rendering, only imported by the display methods of the players.
+"""
+import sys
+
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKCYAN = '\033[96m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+    UNDERLINE = '\033[4m'
+
+# moves the cursor home and clears the screen
+CLEAR_SCREEN = '\033[H\033[J'
+
+
+def wrap_str_in_stars(text: str) -> str:
+    margin = 4
+    char = '*'
+    top = char * (len(text) + 2 * margin) + '\n'
+    text = char + ' ' * (margin - 1) + text + ' ' * (margin - 1) + char
+    bottom = '\n' + top.replace('\n', '')
+    return top + text + bottom
+
+
+class Frame:
+    """ the text of one screen, lines and escape codes are added to a
+    buffer and written to the terminal at once by `write`.
+    """
+    __slots__ = ('parts',)
+
+    def __init__(self):
+        self.parts = []
+
+    def __len__(self):
+        return len(self.parts)
+
+    def line(self, text: str=''):
+        """ adds `text` as `print` would.
+        """
+        self.parts.append(text)
+        self.parts.append('\n')
+
+    def render(self) -> str:
+        return ''.join(self.parts)
+
+    def write(self, stream=None):
+        """ writes the frame with a single write and empties it.
+        """
+        if len(self.parts) == 0:
+            return
+        stream = sys.stdout if stream is None else stream
+        stream.write(self.render())
+        stream.flush()
+        self.parts.clear()
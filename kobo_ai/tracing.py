@@ -0,0 +1,108 @@
+""" counters and events of the AI decisions, `AIPlayer.tracer` is a `Tracer`.
+"""
+from collections import Counter, deque
+import json
+import time
+
+
+class NullSink:
+    """ drops every event, the tracer does not even build them.
+    """
+    enabled = False
+
+    def emit(self, event: dict):
+        pass
+
+    def close(self):
+        pass
+
+
+class RingBufferSink:
+    """ keeps the last `capacity` events in memory.
+    """
+    enabled = True
+
+    def __init__(self, capacity: int=10000):
+        self.events = deque(maxlen=capacity)
+
+    def emit(self, event: dict):
+        self.events.append(event)
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    """ appends every event to `path`, one json object per line.
+    """
+    enabled = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a')
+
+    def emit(self, event: dict):
+        self._file.write(json.dumps(event) + '\n')
+
+    def close(self):
+        self._file.close()
+
+
+class Tracer:
+    """ counts the branches taken by the AI and sends events to `sink`.
+    With `timing`, each decision is timed and the durations are summed
+    per branch. The counters are plain dict increments and no event is
+    built with a `NullSink`, so the default tracer costs close to nothing.
+    """
+    def __init__(self, sink=None, timing: bool=False):
+        self.sink = sink or NullSink()
+        self.timing = timing
+        self.counters = Counter()
+        self.durations = Counter()
+        self.last_branch = None
+
+    def branch(self, name: str):
+        self.counters[name] += 1
+        self.last_branch = name
+
+    def replace_branch(self, name: str):
+        """ counts the current decision under `name` instead of its last branch.
+        """
+        if self.last_branch is not None:
+            self.counters[self.last_branch] -= 1
+        self.branch(name)
+
+    def emit(self, event: str, **fields):
+        if self.sink.enabled:
+            fields['event'] = event
+            self.sink.emit(fields)
+
+    def start(self) -> float:
+        self.last_branch = None
+        return time.perf_counter() if self.timing else 0.
+
+    def decision(self, start: float, card_index: int, call_kobo: bool):
+        """ records the decision started at `start`, a decision without
+        branch came from the decision cache.
+        """
+        branch = self.last_branch
+        if branch is None:
+            branch = 'CACHED'
+            self.counters[branch] += 1
+        duration = None
+        if self.timing:
+            duration = time.perf_counter() - start
+            self.durations[branch] += duration
+        if self.sink.enabled:
+            self.sink.emit(dict(event='decision', branch=branch, card_index=card_index, kobo=call_kobo, seconds=duration))
+
+    def mean_duration(self, branch: str) -> float:
+        n = self.counters[branch]
+        return self.durations[branch] / n if n else 0.
+
+    def reset(self):
+        self.counters.clear()
+        self.durations.clear()
+
+    def close(self):
+        self.sink.close()
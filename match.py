@@ -0,0 +1,224 @@
+from dataclasses import dataclass
+from multiprocessing import Pool
+from typing import Sequence, Tuple
+import os
+import random
+
+import numpy as np
+
+from headless import HeadlessGame, game_seeds
+from kobo_ai import CARD_RANKS, CARD_SUITS, QUEEN, AIPlayer, EmptyDeckRule, Rank, Suit
+
+KING = Rank.KING.value
+RED_SUITS = (Suit.DIAMOND.value, Suit.HEART.value)
+# an empty slot in an array of hands, it reads the last entry of the card tables
+EMPTY = -1
+NO_CALLER = -1
+NO_WINNER = -1
+
+# rank of every card, 0 for an empty slot
+CARD_RANK_ARRAY = np.array(CARD_RANKS + (0,), dtype=np.int32)
+
+
+@dataclass(frozen=True)
+class ScoringRules:
+    """ a round scores the ranks left in each hand, red kings being worth
+    `red_king_points`. The player who called kobo scores 0 when its hand is
+    strictly the lowest, else its points and `kobo_penalty`. A hand of
+    exactly `kamikaze_ranks` scores 0 and gives `kamikaze_points` to every
+    other player. A total reaching exactly `target_score` goes back to
+    `reset_score` and the match ends once a total goes over `target_score`,
+    the lowest total winning.
+    """
+    target_score: int = 100
+    reset_score: int = 50
+    kobo_penalty: int = 10
+    red_king_points: int = 0
+    kamikaze_ranks: Tuple[int, ...] = (QUEEN, QUEEN, KING, KING)
+    kamikaze_points: int = 50
+
+    def card_points(self) -> np.ndarray:
+        """ returns the points of every card, 0 for an empty slot.
+        """
+        points = CARD_RANK_ARRAY.copy()
+        for c in range(len(CARD_RANKS)):
+            if CARD_RANKS[c] == KING and CARD_SUITS[c] in RED_SUITS:
+                points[c] = self.red_king_points
+        return points
+
+
+DEFAULT_RULES = ScoringRules()
+
+
+def score_rounds(hands: np.ndarray, callers: np.ndarray, rules: ScoringRules=DEFAULT_RULES) -> np.ndarray:
+    """ scores many rounds at once. `hands` holds the cards left at the end
+    of each round, shaped (n_rounds, nb_players, nb_slots) with `EMPTY`
+    slots, `callers` the seat who called kobo in each round or `NO_CALLER`.
+    Returns the points of every player, shaped (n_rounds, nb_players).
+    """
+    points = rules.card_points()[hands].sum(-1)
+    scores = points.copy()
+
+    rounds = np.nonzero(callers != NO_CALLER)[0]
+    if len(rounds) > 0:
+        seats = callers[rounds]
+        caller_points = points[rounds, seats]
+        others = points[rounds].copy()
+        others[np.arange(len(rounds)), seats] = np.iinfo(others.dtype).max
+        lowest = caller_points < others.min(-1)
+        scores[rounds, seats] = np.where(lowest, 0, caller_points + rules.kobo_penalty)
+
+    nb_kamikaze = len(rules.kamikaze_ranks)
+    if nb_kamikaze > 0 and hands.shape[-1] >= nb_kamikaze:
+        # empty slots sort first with rank 0
+        ranks = np.sort(CARD_RANK_ARRAY[hands], -1)[..., -nb_kamikaze:]
+        kamikaze = (ranks == sorted(rules.kamikaze_ranks)).all(-1) & ((hands != EMPTY).sum(-1) == nb_kamikaze)
+        rounds = kamikaze.any(-1)
+        scores[rounds] = np.where(kamikaze[rounds], 0, rules.kamikaze_points)
+    return scores
+
+
+class ScoreBoard:
+    """ the totals of `n_matches` matches between `nb_players`, in arrays
+    shaped (n_matches, nb_players), so that the rounds of all the matches
+    are added and the results aggregated with a few array operations.
+    """
+    def __init__(self, n_matches: int, nb_players=2, rules: ScoringRules=DEFAULT_RULES):
+        self.rules = rules
+        self.totals = np.zeros((n_matches, nb_players), dtype=np.int32)
+        self.nb_rounds = np.zeros(n_matches, dtype=np.int32)
+        self.over = np.zeros(n_matches, dtype=bool)
+
+    @property
+    def n_matches(self) -> int:
+        return len(self.totals)
+
+    @property
+    def nb_players(self) -> int:
+        return self.totals.shape[1]
+
+    def running(self) -> np.ndarray:
+        """ returns the indexes of the matches not over.
+        """
+        return np.nonzero(~self.over)[0]
+
+    def add_rounds(self, matches: np.ndarray, scores: np.ndarray):
+        """ adds the `scores` of a round, shaped (len(matches), nb_players),
+        to the totals of `matches`.
+        """
+        rules = self.rules
+        totals = self.totals[matches] + scores
+        totals[totals == rules.target_score] = rules.reset_score
+        self.totals[matches] = totals
+        self.nb_rounds[matches] += 1
+        self.over[matches] = (totals > rules.target_score).any(-1)
+
+    def winners(self) -> np.ndarray:
+        """ returns the seat with the lowest total of every match,
+        `NO_WINNER` on a tie.
+        """
+        is_lowest = self.totals == self.totals.min(-1, keepdims=True)
+        return np.where(is_lowest.sum(-1) == 1, is_lowest.argmax(-1), NO_WINNER)
+
+    def victories(self) -> np.ndarray:
+        winners = self.winners()
+        return np.bincount(winners[winners != NO_WINNER], minlength=self.nb_players)
+
+    def mean_totals(self) -> np.ndarray:
+        return self.totals.mean(0)
+
+    @classmethod
+    def concatenate(cls, boards: Sequence['ScoreBoard']) -> 'ScoreBoard':
+        board = cls(0, boards[0].nb_players, boards[0].rules)
+        board.totals = np.concatenate([b.totals for b in boards])
+        board.nb_rounds = np.concatenate([b.nb_rounds for b in boards])
+        board.over = np.concatenate([b.over for b in boards])
+        return board
+
+
+def play_matches(
+    seeds: Sequence[int],
+    player_classes: Sequence[type]=(AIPlayer, AIPlayer),
+    nb_cards=4,
+    rules: ScoringRules=DEFAULT_RULES,
+    max_rounds=1000,
+    empty_deck_rule: EmptyDeckRule=EmptyDeckRule.END_GAME,
+    max_turns=1000
+    ) -> ScoreBoard:
+    """ plays one match per seed, every round being a headless game with
+    a kobo final round. The running matches play their rounds one after
+    the other on the same game, then the rounds are scored together.
+    """
+    nb_players = len(player_classes)
+    board = ScoreBoard(len(seeds), nb_players, rules)
+    rngs = [random.Random(seed) for seed in seeds]
+    game = HeadlessGame(
+        nb_cards=nb_cards,
+        empty_deck_rule=empty_deck_rule,
+        max_turns=max_turns,
+        player_classes=list(player_classes),
+        kobo_round=True,
+    )
+    hands = np.full((len(seeds), nb_players, nb_cards), EMPTY, dtype=np.int32)
+    callers = np.full(len(seeds), NO_CALLER, dtype=np.int32)
+    for _ in range(max_rounds):
+        matches = board.running()
+        if len(matches) == 0:
+            break
+        for m in matches:
+            game.reset(rngs[m].getrandbits(64))
+            game.play()
+            callers[m] = NO_CALLER if game.kobo_caller is None else game.kobo_caller
+            for seat, player in enumerate(game.players):
+                cards = player.cards.cards
+                hands[m, seat, :len(cards)] = np.frombuffer(cards, dtype=np.uint8)
+                hands[m, seat, len(cards):] = EMPTY
+        board.add_rounds(matches, score_rounds(hands[matches], callers[matches], rules))
+    return board
+
+
+def _play_chunk(args) -> ScoreBoard:
+    seeds, match_kwargs = args
+    return play_matches(seeds, **match_kwargs)
+
+
+def run_matches(
+    n: int,
+    seed=None,
+    player_classes: Sequence[type]=(AIPlayer, AIPlayer),
+    nb_cards=4,
+    rules: ScoringRules=DEFAULT_RULES,
+    max_rounds=1000,
+    nb_workers: int=None,
+    chunk_size=100
+    ) -> ScoreBoard:
+    """ plays `n` matches across a pool of `nb_workers` processes, the same
+    `seed` giving the same totals whatever the number of workers.
+    """
+    match_kwargs = dict(player_classes=list(player_classes), nb_cards=nb_cards, rules=rules, max_rounds=max_rounds)
+    seeds = game_seeds(n, seed)
+    chunks = [(seeds[i:i + chunk_size], match_kwargs) for i in range(0, n, chunk_size)]
+    nb_workers = nb_workers or os.cpu_count()
+    if nb_workers == 1:
+        boards = list(map(_play_chunk, chunks))
+    else:
+        with Pool(nb_workers) as pool:
+            boards = pool.map(_play_chunk, chunks)
+    return ScoreBoard.concatenate(boards)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='plays AI vs AI matches to a target score.')
+    parser.add_argument('-n', type=int, default=1000, help='number of matches')
+    parser.add_argument('--target', type=int, default=DEFAULT_RULES.target_score)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    rules = ScoringRules(target_score=args.target, reset_score=args.target // 2)
+    board = run_matches(args.n, seed=args.seed, rules=rules, nb_workers=args.workers)
+    victories = board.victories()
+    for seat, total in enumerate(board.mean_totals()):
+        print(f'player {seat}: {victories[seat]} victories ({victories[seat] / board.n_matches:.2%}), mean total {total:.1f}')
+    print(f'ties: {board.n_matches - victories.sum()}, mean rounds: {board.nb_rounds.mean():.2f}')
@@ -0,0 +1,227 @@
+from typing import List
+import math
+import random
+import time
+
+import numpy as np
+
+from batch_sim import BatchRollouts
+from belief import BeliefTracker
+from kobo_ai import CARD_RANKS, PlayerI
+from state import JACK_BASE, KOBO, MAX_HAND, PLAY, QUEEN_BASE, SKIP, THROW, GameState, rollout_action
+
+
+class _Node:
+    __slots__ = ('children', 'visits', 'availability', 'reward')
+
+    def __init__(self):
+        self.children = {}
+        self.visits = 0
+        self.availability = 1
+        self.reward = 0.
+
+
+class MCTSAIPlayer(PlayerI):
+    """ single observer information set Monte Carlo tree search.
+    Each iteration samples the cards the player has not seen (its hidden cards,
+    the other players' cards and the deck order) into one `GameState` and
+    walks the tree with `apply` down to a new leaf, going back to the root
+    with `undo` without copying the state. The leaf is played out
+    `playouts_per_leaf` times with `rollout_action`, each playout with its
+    own order of the deck, in a `batch_sim.BatchRollouts` played once
+    `batch_size` leaves are collected. A walk counts a visit without reward
+    in the nodes it goes through, the reward being added when the batch is
+    played, so that the walks of a batch spread over different leaves.
+    The search stops after `time_budget` seconds or `max_playouts` playouts;
+    `playout_turns` cuts playouts short, the player with the fewest cards
+    then being the winner.
+    A walk costs about 100 us and a batch of 256 playouts of 4 turns about
+    1.5 ms, so a 50 ms budget gives about 2000 playouts a move.
+    There is no transposition table: every state of the tree is a new sample
+    of the unseen cards, so its hash almost never comes back.
+    With `beliefs`, the unseen cards are sampled from a `BeliefTracker`
+    instead of uniformly.
+    """
+    __slots__ = (
+        'time_budget', 'max_playouts', 'playout_turns', 'playouts_per_leaf', 'batch_size', 'exploration',
+        'rng', 'np_rng', 'nb_playouts', 'belief'
+    )
+
+    def __init__(
+        self,
+        game,
+        time_budget: float=0.05,
+        max_playouts: int=None,
+        playout_turns: int=4,
+        playouts_per_leaf: int=8,
+        batch_size: int=32,
+        exploration: float=math.sqrt(2),
+        beliefs: bool=False
+        ):
+        if time_budget is None and max_playouts is None:
+            raise ValueError('the search needs a time budget or a number of playouts')
+        super().__init__(game)
+        self.time_budget = time_budget
+        self.max_playouts = max_playouts
+        self.playout_turns = playout_turns
+        self.playouts_per_leaf = playouts_per_leaf
+        self.batch_size = batch_size
+        self.exploration = exploration
+        # its own streams: drawing from the game's would change the deal
+        self.rng = random.Random(game.player_seed('mcts'))
+        self.np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        self.nb_playouts = 0
+        self.belief = BeliefTracker(game, self) if beliefs else None
+
+    def reset(self):
+        """ starts the streams of the new seed of the game, like a new player.
+        """
+        super().reset()
+        self.rng.seed(self.game.player_seed('mcts'))
+        self.np_rng = np.random.default_rng(self.rng.getrandbits(64))
+
+    def play(self, deck_card):
+        state = GameState.from_game(self.game, self, deck_card)
+        root = self._search(state)
+        return self._play_best_actions(root, state, deck_card)
+
+    def _search(self, state: GameState) -> _Node:
+        seat = state.turn
+        slots = [(seat, i) for i in state.hands[seat].hidden_indexes()]
+        for other in range(state.nb_players):
+            if other != seat:
+                slots += [(other, i) for i in range(len(state.hands[other]))]
+        cards = [state.hands[h][i] for h, i in slots] + state.deck
+
+        root = _Node()
+        batch = BatchRollouts(state.nb_players, max(len(h) for h in state.hands), self.np_rng)
+        paths = []
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        n = 0
+        while (self.max_playouts is None or n < self.max_playouts) \
+            and (deadline is None or time.perf_counter() < deadline):
+            if self.belief is None:
+                pool = cards.copy()
+                self.rng.shuffle(pool)
+            else:
+                pool = self.belief.determinize(cards[:len(slots)], cards, self.rng)
+            self._determinize(state, slots, pool)
+            n += self._iterate(state, root, batch, paths)
+            if len(paths) == self.batch_size:
+                self._backpropagate(paths, batch.play(self.playout_turns).tolist())
+        if len(paths) > 0:
+            self._backpropagate(paths, batch.play(self.playout_turns).tolist())
+        self._determinize(state, slots, cards)
+        self.nb_playouts += n
+        return root
+
+    def _determinize(self, state: GameState, slots, pool: List[int]):
+        """ writes `pool` in the unseen `slots` then in the deck.
+        """
+        for (h, i), card in zip(slots, pool):
+            state.hands[h].cards[i] = card
+        state.deck[:] = pool[len(slots):]
+        deck_counts = state.counter.deck_counts
+        for r in range(len(deck_counts)):
+            deck_counts[r] = 0
+        for c in state.deck:
+            deck_counts[CARD_RANKS[c]] += 1
+        state.rehash()
+
+    def _iterate(self, state: GameState, root: _Node, batch: BatchRollouts, paths: list) -> int:
+        """ walks down to a new leaf and adds its playouts to `batch`, or
+        rewards its path at once when the game is over.
+        Returns the number of playouts.
+        """
+        node = root
+        root.visits += 1
+        path = []
+        depth = 0
+        while not state.is_over:
+            actions = state.legal_actions()
+            untried = []
+            for a in actions:
+                child = node.children.get(a)
+                if child is None:
+                    untried.append(a)
+                else:
+                    child.availability += 1
+            mover = state.turn
+            if len(untried) > 0:
+                a = untried[self.rng.randrange(len(untried))]
+                node.children[a] = node = _Node()
+            else:
+                a = max(actions, key=lambda a: self._ucb(node.children[a]))
+                node = node.children[a]
+            node.visits += 1
+            state.apply(a)
+            path.append((node, mover))
+            depth += 1
+            if len(untried) > 0:
+                break
+
+        # the playouts start with a turn
+        while not state.is_over and state.phase != PLAY:
+            state.apply(rollout_action(state, self.rng))
+            depth += 1
+        if state.is_over:
+            self._backpropagate([path], [self._rewards(state)])
+            n = 1
+        else:
+            batch.add(state, self.playouts_per_leaf)
+            paths.append(path)
+            n = self.playouts_per_leaf
+        for _ in range(depth):
+            state.undo()
+        return n
+
+    def _backpropagate(self, paths: list, rewards: List[List[float]]):
+        for path, reward in zip(paths, rewards):
+            for node, mover in path:
+                node.reward += reward[mover]
+        paths.clear()
+
+    def _ucb(self, node: _Node) -> float:
+        return node.reward / node.visits + self.exploration * math.sqrt(math.log(node.availability) / node.visits)
+
+    def _rewards(self, state: GameState) -> List[float]:
+        if state.winner is not None:
+            return [1. if seat == state.winner else 0. for seat in range(state.nb_players)]
+        nb_cards = [len(h) for h in state.hands]
+        fewest = min(nb_cards)
+        nb_fewest = nb_cards.count(fewest)
+        return [1. / nb_fewest if n == fewest else 0. for n in nb_cards]
+
+    def _play_best_actions(self, root: _Node, state: GameState, deck_card: int) -> List[int]:
+        """ plays the most visited actions of the turn in the game
+        and returns the thrown cards.
+        """
+        seat = state.turn
+        opponent = self.game.next_opponent(self)
+        node = root
+        thrown_cards = []
+        while not state.is_over and state.turn == seat and (node is root or state.phase != PLAY):
+            actions = state.legal_actions()
+            visited = [a for a in actions if node is not None and a in node.children]
+            if len(visited) > 0:
+                action = max(visited, key=lambda a: node.children[a].visits)
+                node = node.children[action]
+            else:
+                action = SKIP if SKIP in actions else actions[0]
+                node = None
+
+            if action < JACK_BASE:
+                if action & KOBO:
+                    self.is_kobo = True
+                index = action & ~KOBO
+                if index == THROW:
+                    thrown_cards = self._do_not_substitute_card(deck_card)
+                else:
+                    thrown_cards = self._substitute_card(index, deck_card)
+            elif JACK_BASE <= action < QUEEN_BASE:
+                my_index, other_index = divmod(action - JACK_BASE, MAX_HAND)
+                self._trigger_jack_effect(my_index, other_index, opponent.cards)
+            elif QUEEN_BASE <= action < SKIP:
+                self._trigger_queen_effect(action - QUEEN_BASE)
+            state.apply(action)
+        return thrown_cards
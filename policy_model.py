@@ -0,0 +1,243 @@
+from typing import Dict, List
+import numpy as np
+
+from batch_sim import THROW_DECK_CARD, BatchGame
+from kobo_ai import NB_RANKS, NB_SUITS
+
+# value of a slot in the features, 0 is an empty slot and 1 to NB_RANKS a known rank
+HIDDEN = NB_RANKS + 1
+NB_SLOT_VALUES = NB_RANKS + 2
+# what `collect_self_play` records for every decision
+DATASET_FIELDS = ('hand', 'discovered', 'deck_rank', 'deck_counts', 'opponent_is_kobo', 'action', 'kobo')
+
+
+class PolicyModel:
+    """ a perceptron with one hidden layer playing like `AIPlayer`, trained
+    on its decisions. The features are one-hot: the value of every slot of
+    the hand, the rank of the deck card, the number of cards of each rank
+    left in the deck, the number of hidden cards and the kobo of the
+    opponents. A decision is one of `max_hand` + 1 actions, substituting a
+    slot or throwing the deck card, plus a kobo flag.
+    The hidden layer of a batch of decisions is one product of their
+    one-hot features with `w1`.
+    """
+    def __init__(self, max_hand=4, nb_hidden=128, seed=None):
+        self.max_hand = max_hand
+        self._deck_rank_offset = max_hand * NB_SLOT_VALUES
+        self._counts_offset = self._deck_rank_offset + NB_RANKS
+        self._hidden_offset = self._counts_offset + NB_RANKS * (NB_SUITS + 1)
+        self._kobo_offset = self._hidden_offset + max_hand + 1
+        self.nb_features = self._kobo_offset + 2
+        nb_active = max_hand + NB_RANKS + 3
+        rng = np.random.default_rng(seed)
+        self.w1 = rng.normal(0., 1. / np.sqrt(nb_active), (self.nb_features, nb_hidden)).astype(np.float32)
+        self.b1 = np.zeros(nb_hidden, dtype=np.float32)
+        self.w2 = rng.normal(0., 1. / np.sqrt(nb_hidden), (nb_hidden, max_hand + 2)).astype(np.float32)
+        self.b2 = np.zeros(max_hand + 2, dtype=np.float32)
+
+    @property
+    def nb_actions(self) -> int:
+        return self.max_hand + 1
+
+    def features(self, hand: np.ndarray, discovered: np.ndarray, deck_rank: np.ndarray,
+                 deck_counts: np.ndarray, opponent_is_kobo: np.ndarray) -> np.ndarray:
+        """ returns the indexes of the active features of every decision,
+        shaped (n, max_hand + NB_RANKS + 3). `hand` and `discovered` are
+        shaped (n, nb_slots) like in `BatchGame`, 0 being an empty slot,
+        `deck_counts` (n, NB_RANKS + 1) is indexed by rank.
+        """
+        n, nb_slots = hand.shape
+        if nb_slots > self.max_hand:
+            raise ValueError(f'the model plays hands of at most {self.max_hand} cards')
+        slots = np.zeros((n, self.max_hand), dtype=np.int64)
+        slots[:, :nb_slots] = np.where(discovered, hand, HIDDEN)
+        slots[:, :nb_slots][hand == 0] = 0
+        slots += np.arange(self.max_hand) * NB_SLOT_VALUES
+        counts = np.minimum(deck_counts[:, 1:], NB_SUITS) + self._counts_offset \
+            + np.arange(NB_RANKS) * (NB_SUITS + 1)
+        nb_hidden = ((hand > 0) & ~discovered).sum(1)
+        return np.concatenate([
+            slots,
+            (self._deck_rank_offset + deck_rank - 1)[:, None],
+            counts,
+            (self._hidden_offset + nb_hidden)[:, None],
+            (self._kobo_offset + opponent_is_kobo)[:, None],
+        ], axis=1)
+
+    def one_hot(self, features: np.ndarray) -> np.ndarray:
+        x = np.zeros((len(features), self.nb_features), dtype=np.float32)
+        x[np.arange(len(features))[:, None], features] = 1.
+        return x
+
+    def _forward(self, x: np.ndarray):
+        hidden = x @ self.w1 + self.b1
+        activations = np.maximum(hidden, 0.)
+        return hidden, activations, activations @ self.w2 + self.b2
+
+    def _action_logits(self, logits: np.ndarray, nb_cards: np.ndarray) -> np.ndarray:
+        """ the logits of the actions, the empty slots masked out.
+        """
+        logits = logits[:, :self.nb_actions].copy()
+        empty = np.arange(self.max_hand) >= nb_cards[:, None]
+        logits[:, :self.max_hand][empty] = -np.inf
+        return logits
+
+    def predict(self, features: np.ndarray, nb_cards: np.ndarray):
+        """ returns the index of the substituted card or `THROW_DECK_CARD`
+        for every decision, and whether to call kobo.
+        """
+        _, _, logits = self._forward(self.one_hot(features))
+        action = self._action_logits(logits, nb_cards).argmax(1)
+        return np.where(action == self.max_hand, THROW_DECK_CARD, action), logits[:, -1] > 0
+
+    def decide(self, hand, discovered, deck_rank, deck_counts, opponent_is_kobo):
+        """ `predict` from the arrays of `BatchGame._decide`.
+        """
+        features = self.features(hand, discovered, deck_rank, deck_counts, opponent_is_kobo)
+        return self.predict(features, (hand > 0).sum(1))
+
+    def fit(self, data: Dict[str, np.ndarray], epochs=20, batch_size=1024, lr=1e-3, seed=None) -> List[float]:
+        """ trains the model with Adam on a dataset of `collect_self_play`,
+        minimizing the cross entropy of the actions and of the kobo flags.
+        Returns the mean loss of every epoch.
+        """
+        features = self.features(data['hand'], data['discovered'], data['deck_rank'], data['deck_counts'], data['opponent_is_kobo'])
+        nb_cards = (data['hand'] > 0).sum(1)
+        labels = np.where(data['action'] == THROW_DECK_CARD, self.max_hand, data['action'])
+        kobo = data['kobo'].astype(np.float32)
+        rng = np.random.default_rng(seed)
+        params = [self.w1, self.b1, self.w2, self.b2]
+        moments = [np.zeros_like(p) for p in params]
+        velocities = [np.zeros_like(p) for p in params]
+        beta1, beta2, eps = .9, .999, 1e-8
+        step = 0
+        losses = []
+        for _ in range(epochs):
+            order = rng.permutation(len(labels))
+            total = 0.
+            for start in range(0, len(order), batch_size):
+                rows = order[start:start + batch_size]
+                loss, grads = self._gradients(features[rows], nb_cards[rows], labels[rows], kobo[rows])
+                total += loss * len(rows)
+                step += 1
+                for p, g, m, v in zip(params, grads, moments, velocities):
+                    m *= beta1
+                    m += (1 - beta1) * g
+                    v *= beta2
+                    v += (1 - beta2) * g * g
+                    p -= lr * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + eps)
+            losses.append(total / len(labels))
+        return losses
+
+    def _gradients(self, features, nb_cards, labels, kobo):
+        n = len(labels)
+        x = self.one_hot(features)
+        hidden, activations, logits = self._forward(x)
+        action_logits = self._action_logits(logits, nb_cards)
+        action_logits -= action_logits.max(1, keepdims=True)
+        probs = np.exp(action_logits)
+        probs /= probs.sum(1, keepdims=True)
+        kobo_probs = 1. / (1. + np.exp(-logits[:, -1]))
+        loss = -np.log(probs[np.arange(n), labels] + 1e-12).mean() \
+            - (kobo * np.log(kobo_probs + 1e-12) + (1 - kobo) * np.log(1 - kobo_probs + 1e-12)).mean()
+
+        grad_logits = np.zeros_like(logits)
+        grad_logits[:, :self.nb_actions] = probs
+        grad_logits[np.arange(n), labels] -= 1.
+        grad_logits[:, -1] = kobo_probs - kobo
+        grad_logits /= n
+        grad_hidden = (grad_logits @ self.w2.T) * (hidden > 0)
+        return loss, [x.T @ grad_hidden, grad_hidden.sum(0), activations.T @ grad_logits, grad_logits.sum(0)]
+
+    def agreement(self, data: Dict[str, np.ndarray]) -> float:
+        """ returns the share of the decisions of a dataset the model takes.
+        """
+        action, kobo = self.decide(data['hand'], data['discovered'], data['deck_rank'], data['deck_counts'], data['opponent_is_kobo'])
+        return float(((action == data['action']) & (kobo == data['kobo'])).mean())
+
+    def save(self, path: str):
+        np.savez(path, max_hand=self.max_hand, w1=self.w1, b1=self.b1, w2=self.w2, b2=self.b2)
+
+    @classmethod
+    def load(cls, path: str) -> 'PolicyModel':
+        with np.load(path) as f:
+            model = cls(int(f['max_hand']), f['w1'].shape[1])
+            model.w1, model.b1, model.w2, model.b2 = f['w1'], f['b1'], f['w2'], f['b2']
+        return model
+
+
+class _RecordingBatchGame(BatchGame):
+    def __init__(self, *args, **kwargs):
+        self.records = []
+        super().__init__(*args, **kwargs)
+
+    def _decide(self, hand, disc, x, deck_counts, opponent_is_kobo):
+        action, kobo = super()._decide(hand, disc, x, deck_counts, opponent_is_kobo)
+        self.records.append((hand.copy(), disc.copy(), x.copy(), deck_counts.copy(), opponent_is_kobo.copy(), action, kobo))
+        return action, kobo
+
+
+def collect_self_play(n_games=10000, seed=None, nb_cards=4) -> Dict[str, np.ndarray]:
+    """ plays `n_games` batch games between `AIPlayer`s and returns every
+    decision with its inputs, in arrays named by `DATASET_FIELDS`.
+    """
+    game = _RecordingBatchGame(n_games, nb_cards=nb_cards, seed=seed).play()
+    return {name: np.concatenate(column) for name, column in zip(DATASET_FIELDS, zip(*game.records))}
+
+
+def save_dataset(data: Dict[str, np.ndarray], path: str):
+    np.savez_compressed(path, **data)
+
+
+def load_dataset(path: str) -> Dict[str, np.ndarray]:
+    with np.load(path) as f:
+        return {name: f[name] for name in DATASET_FIELDS}
+
+
+class ModelBatchGame(BatchGame):
+    """ `BatchGame` where every decision of a step is taken by `model`
+    for all the games at once.
+    """
+    def __init__(self, model: PolicyModel, n_games: int, **kwargs):
+        self.model = model
+        super().__init__(n_games, **kwargs)
+
+    def _decide(self, hand, disc, x, deck_counts, opponent_is_kobo):
+        return self.model.decide(hand, disc, x, deck_counts, opponent_is_kobo)
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+    from batch_sim import run_batch
+    parser = argparse.ArgumentParser(description='trains a policy model on the decisions of the AI in self play.')
+    parser.add_argument('path', nargs='?', default=None, help='writes the model to this file')
+    parser.add_argument('--games', type=int, default=20000, help='number of self play games')
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--hidden', type=int, default=128)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    train = collect_self_play(args.games, seed=args.seed)
+    test = collect_self_play(args.games // 10, seed=args.seed + 1)
+    print(f'{len(train["action"])} decisions collected in {time.perf_counter() - start:.1f}s')
+    model = PolicyModel(nb_hidden=args.hidden, seed=args.seed)
+    start = time.perf_counter()
+    losses = model.fit(train, epochs=args.epochs, seed=args.seed)
+    print(f'trained in {time.perf_counter() - start:.1f}s, loss {losses[-1]:.4f}, '
+          f'agreement with the rules {model.agreement(test):.2%}')
+
+    for name, play in [('rules', lambda: run_batch(10000, seed=2)), ('model', lambda: ModelBatchGame(model, 10000, seed=2).play())]:
+        start = time.perf_counter()
+        game = play()
+        elapsed = time.perf_counter() - start
+        print(f'{name}: {elapsed / game.nb_turns.sum() * 1e6:.2f}us per turn in batches of 10000 games')
+    rows = slice(0, 4096)
+    batch = [test[name][rows] for name in DATASET_FIELDS[:5]]
+    start = time.perf_counter()
+    for _ in range(100):
+        model.decide(*batch)
+    print(f'model inference: {(time.perf_counter() - start) / 100 / len(batch[0]) * 1e6:.3f}us per decision in batches of 4096')
+    if args.path is not None:
+        model.save(args.path)
@@ -0,0 +1,193 @@
+from itertools import product
+import random
+import struct
+
+from decision_cache import decode_decision, encode_decision
+from headless import HeadlessGame, game_seeds
+from kobo_ai import DEFAULT_AI_PARAMS, JACK, NB_RANKS, AIParams, AIPlayer
+from kobo_ai.tracing import Tracer
+
+# a rank in a view is 0 for a hidden card or 1 to NB_RANKS
+RADIX = NB_RANKS + 1
+_MAGIC = b'KOBOPT2\0'
+# magic, max hand
+_HEADER = struct.Struct('<8sB')
+# the `AIParams` of the table: great ranks mask, jack only on kobo, kobo max
+# points or -1, number of scarce counts, followed by one byte per count.
+# A new field of `AIParams` needs a new version of the format.
+_PARAMS = struct.Struct('<H?hB')
+
+
+def pack_params(params: AIParams) -> bytes:
+    great_ranks = sum(1 << r for r in params.great_ranks)
+    kobo_max_points = -1 if params.kobo_max_points is None else params.kobo_max_points
+    counts = bytes(params.scarce_counts)
+    return _PARAMS.pack(great_ranks, params.jack_only_on_kobo, kobo_max_points, len(counts)) + counts
+
+
+def unpack_params(data: bytes) -> AIParams:
+    great_ranks, jack_only_on_kobo, kobo_max_points, nb_counts = _PARAMS.unpack_from(data)
+    return AIParams(
+        great_ranks=frozenset(r for r in range(1, NB_RANKS + 1) if (great_ranks >> r) & 1),
+        scarce_counts=tuple(data[_PARAMS.size:_PARAMS.size + nb_counts]),
+        kobo_max_points=None if kobo_max_points == -1 else kobo_max_points,
+        jack_only_on_kobo=jack_only_on_kobo,
+    )
+
+
+class PolicyTable:
+    """ the decision of `AIPlayer` for every view of a hand of at most
+    `max_hand` cards, in a flat array indexed by `index`.
+    The scarce ranks only matter through the first position, from the second
+    card to the deck card, of a scarce rank which is not great, so a view is
+    keyed by the ranks in hand in order, the deck card rank, the opponent
+    kobo flag and this position, 0 when there is none.
+    """
+    def __init__(self, max_hand: int, params: AIParams, data: bytearray=None):
+        self.max_hand = max_hand
+        self.params = params
+        self._offsets = [sum(RADIX ** l for l in range(length)) for length in range(max_hand + 2)]
+        self._nb_positions = max_hand + 2
+        size = self._offsets[-1] * NB_RANKS * 2 * self._nb_positions
+        self.data = data if data is not None else bytearray(size)
+        if len(self.data) != size:
+            raise ValueError('the table does not match its max hand size')
+
+    def index(self, ranks, deck_rank: int, opponent_is_kobo: bool, scarce_position: int) -> int:
+        code = 0
+        for r in reversed(ranks):
+            code = code * RADIX + r
+        code += self._offsets[len(ranks)]
+        return ((code * NB_RANKS + deck_rank - 1) * 2 + opponent_is_kobo) * self._nb_positions + scarce_position
+
+    def scarce_position(self, ranks, deck_rank: int, scarce_ranks: int) -> int:
+        great_ranks = self.params.great_ranks
+        for i in range(1, len(ranks) + 1):
+            r = ranks[i] if i < len(ranks) else deck_rank
+            if (scarce_ranks >> r) & 1 and r not in great_ranks:
+                return i
+        return 0
+
+    def lookup(self, view):
+        """ returns the decision of `AIPlayer.decide` for `view`.
+        """
+        ranks, deck_rank, opponent_is_kobo, scarce_ranks = view
+        scarce_position = self.scarce_position(ranks, deck_rank, scarce_ranks) if 0 not in ranks else 0
+        return decode_decision(self.data[self.index(ranks, deck_rank, opponent_is_kobo, scarce_position)])
+
+    @classmethod
+    def build(cls, max_hand: int=4, params: AIParams=DEFAULT_AI_PARAMS) -> 'PolicyTable':
+        """ runs `AIPlayer.decide` on every view, about 15 s for hands of 4 cards.
+        """
+        table = cls(max_hand, params)
+        player_class = AIPlayer.with_params(params)
+        player_class.tracer = Tracer()
+        decide = player_class.__new__(player_class).decide
+        data = table.data
+        for length in range(max_hand + 1):
+            for ranks in product(range(RADIX), repeat=length):
+                all_known = 0 not in ranks
+                for deck_rank in range(1, NB_RANKS + 1):
+                    # the scarce ranks are only read once every card is known
+                    positions = range(length + 1) if all_known else (0,)
+                    has_jack = deck_rank == JACK or JACK in ranks
+                    for scarce_position in positions:
+                        r = 0
+                        if scarce_position > 0:
+                            r = ranks[scarce_position] if scarce_position < length else deck_rank
+                            if r in params.great_ranks:
+                                continue
+                        decision = encode_decision(decide((ranks, deck_rank, False, (1 << r) & ~1)))
+                        data[table.index(ranks, deck_rank, False, scarce_position)] = decision
+                        # the kobo of an opponent only changes the decision with a jack
+                        if has_jack:
+                            decision = encode_decision(decide((ranks, deck_rank, True, (1 << r) & ~1)))
+                        data[table.index(ranks, deck_rank, True, scarce_position)] = decision
+        return table
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, self.max_hand))
+            f.write(pack_params(self.params))
+            f.write(self.data)
+
+    @classmethod
+    def load(cls, path: str) -> 'PolicyTable':
+        with open(path, 'rb') as f:
+            magic, max_hand = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f'{path} is not a policy table')
+            params = f.read(_PARAMS.size)
+            *_, nb_counts = _PARAMS.unpack(params)
+            params = unpack_params(params + f.read(nb_counts))
+            return cls(max_hand, params, bytearray(f.read()))
+
+
+class TableAIPlayer(AIPlayer):
+    """ `AIPlayer` answering with one lookup in `table`, see `with_table`.
+    The table is never built during a game: a player without a table, or
+    with a table of other params, can not be created.
+    """
+    __slots__ = ()
+
+    table = None
+
+    def __init__(self, game):
+        if self.table is None:
+            raise ValueError('TableAIPlayer needs a table, see TableAIPlayer.with_table')
+        if self.table.params != self.params:
+            raise ValueError('the table was built with other params than the player')
+        super().__init__(game)
+
+    @classmethod
+    def with_table(cls, table: PolicyTable) -> type:
+        """ returns a subclass answering from `table`, with its params.
+        """
+        return type(cls.__name__, (cls,), dict(__slots__=(), table=table, params=table.params))
+
+    def decide(self, view):
+        if len(view[0]) > self.table.max_hand:
+            return super().decide(view)
+        self.tracer.branch('TABLE')
+        return self.table.lookup(view)
+
+
+def check_agreement(table: PolicyTable, n_views=100000, n_games=1000, seed=None) -> int:
+    """ returns the number of disagreements between `table` and `AIPlayer.decide`,
+    on random views and on the views of `n_games` headless games.
+    """
+    rng = random.Random(seed)
+    player_class = AIPlayer.with_params(table.params)
+    player_class.tracer = Tracer()
+    decide = player_class.__new__(player_class).decide
+    views = []
+    for _ in range(n_views):
+        ranks = tuple(rng.randrange(RADIX) for _ in range(rng.randint(0, table.max_hand)))
+        views.append((ranks, rng.randint(1, NB_RANKS), rng.random() < .5, rng.getrandbits(NB_RANKS) << 1))
+
+    class _ViewRecorder(player_class):
+        __slots__ = ()
+
+        def decide(self, view):
+            views.append(view)
+            return super().decide(view)
+
+    for game_seed in game_seeds(n_games, rng.getrandbits(64)):
+        HeadlessGame(seed=game_seed, nb_cards=table.max_hand, player_classes=[_ViewRecorder, _ViewRecorder]).play()
+    return sum(table.lookup(view) != decide(view) for view in views)
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description='builds the policy table of the AI and checks it against the rules.')
+    parser.add_argument('path', nargs='?', default=None, help='writes the table to this file')
+    parser.add_argument('--max-hand', type=int, default=4)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = PolicyTable.build(args.max_hand)
+    print(f'{len(table.data)} entries built in {time.perf_counter() - start:.1f}s')
+    print(f'{check_agreement(table, seed=0)} disagreements with the rules')
+    if args.path is not None:
+        table.save(args.path)
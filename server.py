@@ -0,0 +1,313 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List
+import asyncio
+import random
+import threading
+
+from headless import GameEnd, GameResult, HeadlessGame
+from kobo_ai import CARD_FORMATS, CARD_RANKS, JACK, QUEEN, AIPlayer, DeckExhausted, Player, PlayerInput
+from kobo_ai.tracing import Tracer
+
+# line protocol, the server sends:
+#   HAND <cards, ? for the hidden ones>
+#   OPPONENT <cards, ? for every card>
+#   DRAW <card>
+#   PROMPT play|jack_mine|jack_other|queen
+#   INVALID <message>
+#   THROWN <seat> <cards>
+#   END win|lose|draw
+# and reads answers like the terminal game: a card index from 1,
+# optionally followed by K to call kobo, or Q to throw the deck card
+# or skip the effect of a jack or a queen.
+HUMAN = 0
+AI = 1
+# longest answer read by the server, longer lines are skipped and answered INVALID
+LINE_LIMIT = 1 << 12
+
+
+async def read_line(reader: asyncio.StreamReader) -> str:
+    """ returns the next line of `reader`, '' once the connection is
+    closed, or None when the line is longer than the limit of `reader`,
+    in which case the whole line is skipped. Bytes that are not utf-8 are
+    replaced.
+    """
+    try:
+        line = await reader.readuntil(b'\n')
+    except asyncio.IncompleteReadError as e:
+        line = e.partial
+    except asyncio.LimitOverrunError as e:
+        try:
+            while True:
+                await reader.readexactly(e.consumed)
+                try:
+                    await reader.readuntil(b'\n')
+                    return None
+                except asyncio.LimitOverrunError as overrun:
+                    e = overrun
+        except asyncio.IncompleteReadError:
+            return ''
+    return line.decode(errors='replace')
+
+
+class LockedDecisionCache:
+    """ a `decision_cache.DecisionCache` shared by the threads of the
+    executor, its lookups and inserts being made one at a time.
+    """
+    def __init__(self, cache):
+        self.cache = cache
+        self.lock = threading.Lock()
+
+    def get_or_decide(self, view, decide):
+        with self.lock:
+            return self.cache.get_or_decide(view, decide)
+
+
+def session_class(ai_class: type, decision_cache=None) -> type:
+    """ returns a subclass of `ai_class` for one session, with its own
+    tracer and endgame solver: the AI players of the sessions play in
+    several threads. `decision_cache` replaces the cache of the class.
+    """
+    attributes = dict(__slots__=(), tracer=Tracer(), decision_cache=decision_cache)
+    solver = getattr(ai_class, 'endgame_solver', None)
+    if solver is not None:
+        attributes['endgame_solver'] = type(solver)(solver.max_unknown, solver.time_budget, solver.table.capacity)
+    return type(ai_class.__name__, (ai_class,), attributes)
+
+
+class GameSession:
+    """ a game between a remote player, reading its answers from `reader`,
+    and an AI player, whose moves run in `executor` so that a slow
+    search never blocks the other sessions.
+    """
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        executor: Executor=None,
+        ai_class: type=AIPlayer,
+        nb_cards=4,
+        seed=None,
+        max_turns=1000
+        ):
+        self.reader = reader
+        self.writer = writer
+        self.executor = executor
+        self.game = HeadlessGame(nb_cards=nb_cards, seed=seed, max_turns=max_turns, player_classes=[Player, ai_class])
+        # the counters of the AI of this session only, when `ai_class` comes from `session_class`
+        self.tracer = getattr(ai_class, 'tracer', None)
+        self.human, self.ai = self.game.players
+
+    def send(self, *words):
+        self.writer.write((' '.join(str(w) for w in words) + '\n').encode())
+
+    def send_cards(self):
+        cards = self.human.cards
+        self.send('HAND', *[CARD_FORMATS[c] if cards.is_discovered(i) else '?' for i, c in enumerate(cards)])
+        self.send('OPPONENT', *['?'] * len(self.ai.cards))
+
+    async def ask(self, prompt: str, nb_cards: int, accept_commands=True) -> PlayerInput:
+        """ prompts the player until a valid answer, returns None
+        if the connection is closed.
+        """
+        inp = PlayerInput()
+        while True:
+            self.send('PROMPT', prompt)
+            await self.writer.drain()
+            line = await read_line(self.reader)
+            if line == '':
+                return None
+            if line is None:
+                self.send('INVALID', f'answers are at most {LINE_LIMIT} bytes long')
+                continue
+            if inp.parse(line.strip(), nb_cards, accept_indexes=True, accept_commands=accept_commands) \
+                and (inp.is_index or inp.is_quit_key):
+                return inp
+            self.send('INVALID', inp._invalid_input_msg(nb_cards))
+
+    async def run(self) -> GameResult:
+        game = self.game
+        turn = game.rng.randrange(len(game.players))
+        loop = asyncio.get_running_loop()
+        result = GameResult(None, game.max_turns, GameEnd.MAX_TURNS)
+        for nb_turns in range(game.max_turns):
+            player = game.players[turn]
+            try:
+                deck_card = game.pop_card()
+            except DeckExhausted:
+                result = GameResult(None, nb_turns, GameEnd.DECK_EXHAUSTED)
+                break
+            if player is self.human:
+                thrown_cards = await self.play_human(deck_card)
+                if thrown_cards is None:
+                    return None
+            else:
+                thrown_cards = await loop.run_in_executor(self.executor, self.ai.play, deck_card)
+            self.send('THROWN', turn, *[CARD_FORMATS[c] for c in thrown_cards])
+            winner = game.end_turn(player, thrown_cards)
+            if winner is not None:
+                result = GameResult(game.players.index(winner), nb_turns + 1, GameEnd.VICTORY)
+                break
+            turn = (turn + 1) % len(game.players)
+        self.send('END', 'draw' if result.winner is None else 'win' if result.winner == HUMAN else 'lose')
+        await self.writer.drain()
+        return result
+
+    async def play_human(self, deck_card: int) -> List[int]:
+        """ plays the turn of the remote player like `Player.play`,
+        returns None if the connection is closed.
+        """
+        human = self.human
+        self.send_cards()
+        self.send('DRAW', CARD_FORMATS[deck_card])
+        inp = await self.ask('play', len(human.cards))
+        if inp is None:
+            return None
+        human.is_kobo = human.is_kobo or inp.is_kobo
+        if inp.is_index:
+            thrown_cards = human._substitute_card(inp.value, deck_card)
+        else:
+            thrown_cards = human._do_not_substitute_card(deck_card)
+
+        for card in thrown_cards:
+            if CARD_RANKS[card] == JACK and len(human.cards) > 0 and len(self.ai.cards) > 0:
+                self.send_cards()
+                inp = await self.ask('jack_mine', len(human.cards))
+                if inp is None:
+                    return None
+                if inp.is_quit_key:
+                    break
+                my_card = inp.value
+                inp = await self.ask('jack_other', len(self.ai.cards), accept_commands=False)
+                if inp is None:
+                    return None
+                human._trigger_jack_effect(my_card, inp.value, self.ai.cards)
+            if CARD_RANKS[card] == QUEEN and len(human.cards) > 0:
+                self.send_cards()
+                inp = await self.ask('queen', len(human.cards))
+                if inp is None:
+                    return None
+                if inp.is_quit_key:
+                    break
+                human._trigger_queen_effect(inp.value)
+        return thrown_cards
+
+
+class GameServer:
+    """ hosts one `GameSession` per connection. The moves of the AI players
+    run in a pool of `nb_workers` threads, every session having its own
+    `session_class` of `ai_class`, and the decision cache of `ai_class`
+    being shared behind a lock.
+    """
+    def __init__(self, ai_class: type=AIPlayer, nb_cards=4, seed=None, nb_workers: int=None):
+        self.ai_class = ai_class
+        cache = getattr(ai_class, 'decision_cache', None)
+        self.decision_cache = None if cache is None else LockedDecisionCache(cache)
+        self.nb_cards = nb_cards
+        self.rng = random.Random(seed)
+        self.executor = ThreadPoolExecutor(nb_workers)
+        self.nb_sessions = 0
+        self.results = []
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.nb_sessions += 1
+        ai_class = session_class(self.ai_class, self.decision_cache)
+        session = GameSession(reader, writer, self.executor, ai_class, self.nb_cards, self.rng.getrandbits(64))
+        try:
+            result = await session.run()
+            if result is not None:
+                self.results.append(result)
+        except ConnectionError:
+            pass
+        finally:
+            self.nb_sessions -= 1
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=8765, backlog=4096) -> asyncio.AbstractServer:
+        """ `backlog` bounds the connections waiting to be accepted, the
+        default of asyncio (100) stalls bursts of a few hundred clients.
+        """
+        return await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT, backlog=backlog)
+
+    async def serve(self, host='127.0.0.1', port=8765, backlog=4096):
+        server = await self.start(host, port, backlog)
+        async with server:
+            await server.serve_forever()
+
+
+async def bot_client(host='127.0.0.1', port=8765, seed=None) -> str:
+    """ plays a game against the server with random valid answers,
+    returns the result sent by the server.
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    nb_cards, nb_opponent_cards = 0, 0
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return None
+            words = line.decode().split()
+            if words[0] == 'HAND':
+                nb_cards = len(words) - 1
+            elif words[0] == 'OPPONENT':
+                nb_opponent_cards = len(words) - 1
+            elif words[0] == 'PROMPT':
+                n = nb_opponent_cards if words[1] == 'jack_other' else nb_cards
+                answer = str(rng.randint(1, n))
+                if words[1] != 'jack_other' and rng.random() < .2:
+                    answer = 'Q'
+                if words[1] == 'play' and rng.random() < .05:
+                    answer += ' K'
+                writer.write((answer + '\n').encode())
+            elif words[0] == 'END':
+                return words[1]
+    finally:
+        writer.close()
+
+
+async def human_client(host='127.0.0.1', port=8765):
+    """ plays a game from the terminal.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    loop = asyncio.get_running_loop()
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        line = line.decode().strip()
+        if line.startswith('PROMPT'):
+            answer = await loop.run_in_executor(None, input, f'{line.split()[1]}: ')
+            writer.write((answer + '\n').encode())
+        else:
+            print(line)
+            if line.startswith('END'):
+                break
+    writer.close()
+
+
+async def run_bots(n: int, host='127.0.0.1', port=8765, seed=None) -> List[str]:
+    """ plays `n` concurrent games against the server.
+    """
+    rng = random.Random(seed)
+    return await asyncio.gather(*[bot_client(host, port, rng.getrandbits(64)) for _ in range(n)])
+
+
+if __name__ == '__main__':
+    import argparse
+    from collections import Counter
+    parser = argparse.ArgumentParser(description='hosts games against the AI over tcp.')
+    parser.add_argument('mode', choices=['serve', 'play', 'bots'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--backlog', type=int, default=4096, help='connections waiting to be accepted')
+    parser.add_argument('-n', type=int, default=100, help='number of bots')
+    args = parser.parse_args()
+
+    if args.mode == 'serve':
+        asyncio.run(GameServer(seed=args.seed, nb_workers=args.workers).serve(args.host, args.port, args.backlog))
+    elif args.mode == 'play':
+        asyncio.run(human_client(args.host, args.port))
+    else:
+        print(Counter(asyncio.run(run_bots(args.n, args.host, args.port, args.seed))))
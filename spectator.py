@@ -0,0 +1,132 @@
+from typing import List
+import sys
+import threading
+import time
+
+from kobo_ai import CARD_FORMATS, Game
+from kobo_ai.terminal import CLEAR_SCREEN, Colors, Frame, wrap_str_in_stars
+
+
+class Spectator:
+    """ shows the games played on `game` at most `refresh_rate` times per
+    second. It registers on `game` like a `belief.BeliefTracker`, but a
+    turn only reads the clock: once the refresh period has elapsed, the
+    table is rendered in a `terminal.Frame` and its text is left in a
+    single slot read by a writer thread. A frame still in the slot when
+    the next one is rendered is dropped, so a slow terminal costs frames
+    and never blocks the games. `close` writes the last frame.
+    """
+    __slots__ = (
+        'game', 'period', 'stream', 'nb_games', 'nb_turns', 'nb_frames', 'nb_dropped',
+        '_next_frame', '_last_time', '_last_games', '_last_turns',
+        '_pending', '_closed', '_condition', '_writer'
+    )
+
+    def __init__(self, game: Game, refresh_rate: float=10., stream=None):
+        self.game = game
+        self.period = 1 / refresh_rate
+        self.stream = stream
+        self.nb_games = 0
+        self.nb_turns = 0
+        self.nb_frames = 0
+        self.nb_dropped = 0
+        self._next_frame = 0.
+        self._last_time = time.perf_counter()
+        self._last_games = 0
+        self._last_turns = 0
+        self._pending = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._writer = threading.Thread(target=self._write_frames, name='spectator', daemon=True)
+        self._writer.start()
+        game.trackers = game.trackers + (self,)
+
+    def reset(self):
+        self.nb_games += 1
+
+    def observe_turn(self, player, thrown_cards: List[int]):
+        self.nb_turns += 1
+        now = time.perf_counter()
+        if now >= self._next_frame:
+            self._next_frame = now + self.period
+            frame = Frame()
+            self.render(frame, player, thrown_cards, now)
+            with self._condition:
+                if self._pending is not None:
+                    self.nb_dropped += 1
+                self._pending = frame.render()
+                self._condition.notify()
+            self.nb_frames += 1
+
+    def _write_frames(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                text, self._pending = self._pending, None
+            if text is None:
+                return
+            stream = sys.stdout if self.stream is None else self.stream
+            stream.write(text)
+            stream.flush()
+
+    def close(self):
+        """ writes the pending frame and stops the writer thread.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._writer.join()
+
+    def render(self, frame: Frame, player, thrown_cards: List[int], now: float):
+        """ adds the table after the turn of `player` to `frame`, with the
+        games and turns per second since the last frame. The cards are all
+        shown, in brackets when their owner has not seen them.
+        """
+        elapsed = max(now - self._last_time, 1e-9)
+        games_per_second = (self.nb_games - self._last_games) / elapsed
+        turns_per_second = (self.nb_turns - self._last_turns) / elapsed
+        self._last_time, self._last_games, self._last_turns = now, self.nb_games, self.nb_turns
+
+        game = self.game
+        frame.line(CLEAR_SCREEN + Colors.BOLD + f'game {self.nb_games}, turn {self.nb_turns}' + Colors.ENDC)
+        frame.line(f'{games_per_second:,.0f} games/s, {turns_per_second:,.0f} turns/s')
+        for seat, p in enumerate(game.players):
+            hand = p.cards
+            cards = ' '.join(
+                CARD_FORMATS[c] if hand.is_discovered(i) else f'[{CARD_FORMATS[c]}]' for i, c in enumerate(hand)
+            )
+            color = Colors.FAIL if p is player else Colors.OKCYAN
+            frame.line()
+            frame.line(color + f'seat {seat}: {p.victories} victories' + (', KOBO' if p.is_kobo else '') + Colors.ENDC)
+            frame.line(wrap_str_in_stars(cards or '-'))
+        frame.line()
+        frame.line(f'deck: {len(game.deck)} cards, thrown: {len(game.thrown_deck)} cards')
+        frame.line(f'seat {game.players.index(player)} threw {" ".join(CARD_FORMATS[c] for c in thrown_cards)}')
+
+
+if __name__ == '__main__':
+    import argparse
+    from collections import Counter
+    from headless import HeadlessGame, game_seeds
+    parser = argparse.ArgumentParser(description='watches headless AI vs AI games played at full speed.')
+    parser.add_argument('-n', type=int, default=100000, help='number of games')
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--refresh-rate', type=float, default=10., help='frames per second')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    seeds = game_seeds(args.n, args.seed)
+    game = HeadlessGame(nb_players=args.players, seed=seeds[0])
+    spectator = Spectator(game, args.refresh_rate)
+    ends = Counter()
+    start = time.perf_counter()
+    for seed in seeds:
+        game.reset(seed)
+        ends[game.play().end.value] += 1
+    elapsed = time.perf_counter() - start
+    spectator.close()
+    print(
+        f'{args.n} games in {elapsed:.2f}s ({args.n / elapsed:,.0f} games/s), '
+        f'{spectator.nb_frames} frames, {spectator.nb_dropped} dropped: {dict(ends)}'
+    )
@@ -0,0 +1,326 @@
+from typing import List
+import random
+
+from kobo_ai import CARD_RANKS, DECK_SIZE, JACK, NB_RANKS, NB_SUITS, QUEEN, CardCounter, Game, Hand
+
+# actions are small ints:
+# - 0 to MAX_HAND - 1 substitute the card at this index, THROW throws the deck card,
+#   both optionally combined with the KOBO flag,
+# - JACK_BASE + my_index * MAX_HAND + other_index swaps a card with the next opponent,
+# - QUEEN_BASE + index peeks one of the player's hidden cards,
+# - SKIP ends the turn without using the effect of the thrown jacks or queens.
+MAX_HAND = 8
+THROW = MAX_HAND
+KOBO = 16
+JACK_BASE = 32
+QUEEN_BASE = JACK_BASE + MAX_HAND * MAX_HAND
+SKIP = QUEEN_BASE + MAX_HAND
+NB_ACTIONS = SKIP + 1
+
+# phases of a turn
+PLAY = 0
+JACK_EFFECT = 1
+QUEEN_EFFECT = 2
+OVER = 3
+
+# zobrist keys, the hash of a state xors the keys of its features
+MAX_PLAYERS = 8
+_zobrist_rng = random.Random(0x6b6f626f)
+
+def _keys(*shape):
+    if len(shape) == 1:
+        return [_zobrist_rng.getrandbits(64) for _ in range(shape[0])]
+    return [_keys(*shape[1:]) for _ in range(shape[0])]
+
+CARD_KEYS = _keys(MAX_PLAYERS, MAX_HAND, DECK_SIZE)
+DISCOVERED_KEYS = _keys(MAX_PLAYERS, MAX_HAND)
+HAND_SIZE_KEYS = _keys(MAX_PLAYERS, MAX_HAND + 1)
+TOP_KEYS = [0] + _keys(DECK_SIZE)
+DECK_KEYS = _keys(NB_RANKS + 1, NB_SUITS + 1)
+TURN_KEYS = _keys(MAX_PLAYERS)
+PHASE_KEYS = _keys(4)
+DECK_CARD_KEYS = _keys(DECK_SIZE)
+KOBO_KEYS = _keys(MAX_PLAYERS)
+PENDING_KEYS = _keys(NB_SUITS + 2)
+
+
+def jack_action(my_index: int, other_index: int) -> int:
+    return JACK_BASE + my_index * MAX_HAND + other_index
+
+
+def queen_action(index: int) -> int:
+    return QUEEN_BASE + index
+
+
+class GameState:
+    """ compact game state for search, with every action reversible.
+    `apply` pushes what it changes on an undo stack and `undo` pops it back,
+    saving only the hands it changes (O(hand size) each), never the whole state.
+    `hash` is a zobrist hash of the hands, discovered cards, top of the thrown
+    pile, deck composition, turn, phase and kobo flags. `apply` updates it
+    with the keys of the slots it changes: a substituted or swapped card, a
+    discovered card, or the slots after the first card thrown from a hand.
+    The game is played with `EmptyDeckRule.END_GAME`.
+    """
+    __slots__ = (
+        'hands', 'kobo', 'deck', 'thrown', 'counter', 'turn', 'phase',
+        'deck_card', 'thrown_rank', 'pending', 'winner', 'nb_turns', 'hash', '_undo_stack', '_saved_hands'
+    )
+
+    def __init__(self, hands: List[Hand], kobo: List[bool], deck: List[int], thrown: List[int], turn: int, deck_card: int):
+        if max(len(h) for h in hands) > MAX_HAND:
+            raise ValueError(f'hands of more than {MAX_HAND} cards are not supported')
+        if len(hands) > MAX_PLAYERS:
+            raise ValueError(f'games of more than {MAX_PLAYERS} players are not supported')
+        self.hands = hands
+        self.kobo = kobo
+        self.deck = deck
+        self.thrown = thrown
+        self.counter = CardCounter.from_cards(deck, thrown)
+        self.turn = turn
+        self.phase = PLAY
+        self.deck_card = deck_card
+        self.thrown_rank = 0
+        self.pending = 0
+        self.winner = None
+        self.nb_turns = 0
+        self._undo_stack = []
+        # (seat, cards, discovered) of the hands before `apply` changed them
+        self._saved_hands = []
+        self.rehash()
+
+    @classmethod
+    def from_game(cls, game: Game, player, deck_card: int) -> 'GameState':
+        """ returns the state of `game` when `player` has drawn `deck_card`.
+        """
+        return cls(
+            [p.cards.copy() for p in game.players],
+            [p.is_kobo for p in game.players],
+            list(game.deck),
+            list(game.thrown_deck),
+            game.players.index(player),
+            deck_card,
+        )
+
+    @property
+    def nb_players(self) -> int:
+        return len(self.hands)
+
+    @property
+    def is_over(self) -> bool:
+        return self.phase == OVER
+
+    def next_seat(self, seat: int) -> int:
+        return (seat + 1) % len(self.hands)
+
+    def rehash(self):
+        """ computes the hash from scratch, after the cards were changed
+        without `apply`.
+        """
+        h = self._turn_hash()
+        for seat in range(len(self.hands)):
+            h ^= self._slots_hash(seat, 0)
+        for seat, kobo in enumerate(self.kobo):
+            if kobo:
+                h ^= KOBO_KEYS[seat]
+        for r in range(1, NB_RANKS + 1):
+            h ^= DECK_KEYS[r][self.counter.deck_counts[r]]
+        self.hash = h
+
+    def _slots_hash(self, seat: int, start: int) -> int:
+        """ hash of the size of the hand of `seat` and of its slots from `start`.
+        """
+        hand = self.hands[seat]
+        cards, discovered = hand.cards, hand.discovered
+        card_keys, discovered_keys = CARD_KEYS[seat], DISCOVERED_KEYS[seat]
+        h = HAND_SIZE_KEYS[seat][len(cards)]
+        for i in range(start, len(cards)):
+            h ^= card_keys[i][cards[i]]
+            if (discovered >> i) & 1:
+                h ^= discovered_keys[i]
+        return h
+
+    def _turn_hash(self) -> int:
+        h = TURN_KEYS[self.turn] ^ PHASE_KEYS[self.phase] ^ PENDING_KEYS[self.pending]
+        h ^= TOP_KEYS[self.thrown[-1] + 1] if len(self.thrown) > 0 else TOP_KEYS[0]
+        if self.phase == PLAY:
+            h ^= DECK_CARD_KEYS[self.deck_card]
+        return h
+
+    def _save_hand(self, seat: int):
+        hand = self.hands[seat]
+        self._saved_hands.append((seat, bytes(hand.cards), hand.discovered))
+
+    def _set_card(self, seat: int, index: int, card: int, discovered: bool):
+        hand = self.hands[seat]
+        keys = CARD_KEYS[seat][index]
+        h = self.hash ^ keys[hand.cards[index]] ^ keys[card]
+        if hand.is_discovered(index) != discovered:
+            h ^= DISCOVERED_KEYS[seat][index]
+        hand.set(index, card, discovered=discovered)
+        self.hash = h
+
+    def _discover(self, seat: int, index: int):
+        hand = self.hands[seat]
+        if not hand.is_discovered(index):
+            self.hash ^= DISCOVERED_KEYS[seat][index]
+            hand.discover(index)
+
+    def _remove_ranks(self, seat: int, rank: int, discovered_only: bool=False) -> List[int]:
+        """ `Hand.remove_ranks` of `rank`, rehashing the slots from the first
+        removed card, the ones after it being moved.
+        """
+        hand = self.hands[seat]
+        cards, discovered = hand.cards, hand.discovered
+        for first in range(len(cards)):
+            if CARD_RANKS[cards[first]] == rank and (not discovered_only or (discovered >> first) & 1):
+                break
+        else:
+            return []
+        self._save_hand(seat)
+        h = self.hash ^ self._slots_hash(seat, first)
+        removed = hand.remove_ranks((rank,), discovered_only=discovered_only)
+        self.hash = h ^ self._slots_hash(seat, first)
+        return removed
+
+    def legal_actions(self) -> List[int]:
+        hand = self.hands[self.turn]
+        if self.phase == PLAY:
+            actions = [*range(len(hand)), THROW]
+            if not self.kobo[self.turn]:
+                actions += [a | KOBO for a in actions]
+            return actions
+        if self.phase == JACK_EFFECT:
+            other_hand = self.hands[self.next_seat(self.turn)]
+            return [jack_action(i, j) for i in range(len(hand)) for j in range(len(other_hand))] + [SKIP]
+        if self.phase == QUEEN_EFFECT:
+            return [queen_action(i) for i in hand.hidden_indexes()] + [SKIP]
+        return []
+
+    def apply(self, action: int):
+        seat = self.turn
+        self._undo_stack.append((
+            self.phase, seat, self.deck_card, self.thrown_rank, self.pending,
+            self.winner, self.nb_turns, self.kobo[seat], len(self.thrown), len(self.deck),
+            len(self._saved_hands), self.hash,
+        ))
+        self.hash ^= self._turn_hash()
+        hand = self.hands[seat]
+
+        if self.phase == PLAY:
+            if action & KOBO and not self.kobo[seat]:
+                self.kobo[seat] = True
+                self.hash ^= KOBO_KEYS[seat]
+            index = action & ~KOBO
+            if index == THROW:
+                thrown = [self.deck_card]
+                self.thrown_rank = CARD_RANKS[self.deck_card]
+            else:
+                thrown = [hand[index]]
+                self.thrown_rank = hand.rank(index)
+                self._save_hand(seat)
+                self._set_card(seat, index, self.deck_card, True)
+            thrown += self._remove_ranks(seat, self.thrown_rank, discovered_only=True)
+            self._throw(thrown)
+
+            other_hand = self.hands[self.next_seat(self.turn)]
+            if self.thrown_rank == JACK and len(hand) > 0 and len(other_hand) > 0:
+                self.phase, self.pending = JACK_EFFECT, len(thrown)
+            elif self.thrown_rank == QUEEN and len(hand.hidden_indexes()) > 0:
+                self.phase, self.pending = QUEEN_EFFECT, len(thrown)
+            else:
+                self._end_turn()
+
+        elif action == SKIP:
+            self._end_turn()
+
+        elif self.phase == JACK_EFFECT:
+            my_index, other_index = divmod(action - JACK_BASE, MAX_HAND)
+            other_seat = self.next_seat(seat)
+            my_card = hand[my_index]
+            self._save_hand(seat)
+            self._save_hand(other_seat)
+            self._set_card(seat, my_index, self.hands[other_seat][other_index], False)
+            self._set_card(other_seat, other_index, my_card, False)
+            self.pending -= 1
+            if self.pending == 0:
+                self._end_turn()
+
+        elif self.phase == QUEEN_EFFECT:
+            self._save_hand(seat)
+            self._discover(seat, action - QUEEN_BASE)
+            self.pending -= 1
+            if self.pending == 0 or len(hand.hidden_indexes()) == 0:
+                self._end_turn()
+
+        self.hash ^= self._turn_hash()
+
+    def undo(self):
+        phase, turn, deck_card, thrown_rank, pending, winner, nb_turns, kobo, \
+            nb_thrown, deck_size, nb_saved_hands, self.hash = self._undo_stack.pop()
+        if len(self.deck) < deck_size:
+            self.deck.append(self.deck_card)
+            self.counter.deck_counts[CARD_RANKS[self.deck_card]] += 1
+        while len(self.thrown) > nb_thrown:
+            self.counter.thrown_counts[CARD_RANKS[self.thrown.pop()]] -= 1
+        saved_hands = self._saved_hands
+        while len(saved_hands) > nb_saved_hands:
+            seat, cards, discovered = saved_hands.pop()
+            hand = self.hands[seat]
+            hand.cards[:] = cards
+            hand.discovered = discovered
+        self.phase, self.turn, self.deck_card, self.thrown_rank, self.pending = phase, turn, deck_card, thrown_rank, pending
+        self.winner, self.nb_turns = winner, nb_turns
+        self.kobo[turn] = kobo
+
+    def _throw(self, cards: List[int]):
+        self.thrown += cards
+        self.counter.throw(cards)
+
+    def _end_turn(self):
+        """ the other players throw their duplicates, then the next player
+        draws a card unless the game is over.
+        """
+        for seat in range(len(self.hands)):
+            if seat != self.turn:
+                self._throw(self._remove_ranks(seat, self.thrown_rank))
+        self.nb_turns += 1
+        if len(self.hands[self.turn].cards) == 0:
+            self.winner = self.turn
+        else:
+            for seat, hand in enumerate(self.hands):
+                if len(hand.cards) == 0:
+                    self.winner = seat
+                    break
+        if self.winner is not None or len(self.deck) == 0:
+            self.phase = OVER
+            return
+        self.phase = PLAY
+        self.turn = self.next_seat(self.turn)
+        self.deck_card = self.deck.pop()
+        r = CARD_RANKS[self.deck_card]
+        self.hash ^= DECK_KEYS[r][self.counter.deck_counts[r]]
+        self.counter.draw(self.deck_card)
+        self.hash ^= DECK_KEYS[r][self.counter.deck_counts[r]]
+
+
+def legal_actions(state: GameState) -> List[int]:
+    return state.legal_actions()
+
+
+def rollout_action(state: GameState, rng: random.Random) -> int:
+    """ cheap default policy: discover hidden cards, then throw the highest card,
+    use jacks on random cards and queens on the first hidden card.
+    """
+    hand = state.hands[state.turn]
+    if state.phase == PLAY:
+        hidden = hand.hidden_indexes()
+        if len(hidden) > 0:
+            return hidden[0]
+        ranks = hand.ranks()
+        highest = max(range(len(ranks)), key=ranks.__getitem__)
+        return highest if ranks[highest] > CARD_RANKS[state.deck_card] else THROW
+    if state.phase == QUEEN_EFFECT:
+        return queen_action(hand.hidden_indexes()[0])
+    actions = state.legal_actions()
+    return actions[rng.randrange(len(actions))]
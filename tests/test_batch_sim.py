@@ -0,0 +1,15 @@
+import numpy as np
+
+from batch_sim import equivalence_test, run_batch
+
+
+def test_batch_game_is_equivalent_to_headless_game():
+    report = equivalence_test(n_games=20000, seed=0)
+    assert report.equivalent, list(zip(report.outcomes, report.intervals))
+
+
+def test_batch_game_is_reproducible():
+    a = run_batch(1000, seed=1)
+    b = run_batch(1000, seed=1)
+    assert np.array_equal(a.winner, b.winner)
+    assert np.array_equal(a.nb_turns, b.nb_turns)
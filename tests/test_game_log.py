@@ -0,0 +1,75 @@
+import pytest
+
+from game_log import GameLogReader, GameLogWriter
+from headless import HeadlessGame, game_seeds
+from belief import BeliefAIPlayer
+from kobo_ai import AIParams, AIPlayer, EmptyDeckRule
+
+
+def _state(game: HeadlessGame):
+    return (
+        [(bytes(p.cards.cards), p.cards.discovered, p.is_kobo) for p in game.players],
+        list(game.deck),
+        list(game.thrown_deck),
+        list(game.counter.deck_counts),
+        list(game.counter.thrown_counts),
+    )
+
+
+class _StateRecorder:
+    """ keeps the state of the game after every turn.
+    """
+    def __init__(self, game: HeadlessGame):
+        self.game = game
+        self.states = []
+        game.trackers = game.trackers + (self,)
+
+    def reset(self):
+        pass
+
+    def observe_turn(self, player, thrown_cards):
+        self.states.append(_state(self.game))
+
+
+@pytest.mark.parametrize('game_kwargs', [
+    dict(),
+    dict(empty_deck_rule=EmptyDeckRule.RESHUFFLE, nb_cards=10),
+    dict(nb_players=3),
+    dict(nb_players=3, kobo_round=True),
+])
+def test_replay_matches_the_recorded_games(tmp_path, game_kwargs):
+    path = str(tmp_path / 'games.log')
+    games = []
+    with GameLogWriter(path) as log:
+        for seed in game_seeds(50, 0):
+            game = HeadlessGame(seed=seed, **game_kwargs)
+            recorder = _StateRecorder(game)
+            start = _state(game)
+            log.record(game)
+            games.append((game.play(), start, recorder.states))
+
+    with GameLogReader(path) as reader:
+        logged_games = list(reader.games())
+        assert len(logged_games) == len(games)
+        for logged, (result, start, states) in zip(logged_games, games):
+            assert logged.result == result
+            assert _state(logged.replay(0)) == start
+            for turn in range(1, len(states) + 1, 7):
+                assert _state(logged.replay(turn)) == states[turn - 1]
+            replayed = logged.replay()
+            assert _state(replayed) == states[-1]
+            assert replayed.kobo_round == game_kwargs.get('kobo_round', False)
+            assert replayed.empty_deck_rule == game_kwargs.get('empty_deck_rule', EmptyDeckRule.END_GAME)
+
+
+def test_replay_can_be_played_on(tmp_path):
+    path = str(tmp_path / 'games.log')
+    with GameLogWriter(path) as log:
+        game = HeadlessGame(seed=0, player_classes=[AIPlayer.with_params(AIParams(kobo_max_points=3)), BeliefAIPlayer])
+        log.record(game)
+        game.play()
+    with GameLogReader(path) as reader:
+        logged, = reader.games()
+        replayed = logged.replay(3)
+    assert [type(p) for p in replayed.players] == [AIPlayer, BeliefAIPlayer]
+    assert replayed.play().nb_turns > 0
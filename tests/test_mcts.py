@@ -0,0 +1,85 @@
+import random
+
+import numpy as np
+
+from batch_sim import BatchRollouts
+from headless import HeadlessGame
+from kobo_ai import AIPlayer
+from mcts import MCTSAIPlayer
+from state import PLAY, GameState, rollout_action
+
+
+class _FixedPlayouts(MCTSAIPlayer):
+    __slots__ = ()
+
+    def __init__(self, game):
+        super().__init__(game, time_budget=None, max_playouts=400)
+
+
+def _snapshot(state: GameState):
+    return (
+        tuple((bytes(h.cards), h.discovered) for h in state.hands), tuple(state.deck), tuple(state.thrown),
+        tuple(state.counter.deck_counts), state.turn, state.phase, state.deck_card, state.hash,
+    )
+
+
+def test_search_returns_a_legal_action():
+    for seed in range(10):
+        game = HeadlessGame(seed=seed, nb_players=2 + seed % 3, player_classes=None)
+        player = _FixedPlayouts(game)
+        state = GameState.from_game(game, game.players[0], game.pop_card())
+        before = _snapshot(state)
+        root = player._search(state)
+        assert _snapshot(state) == before
+        assert len(root.children) > 0
+        assert set(root.children) <= set(state.legal_actions())
+        assert sum(child.visits for child in root.children.values()) == root.visits
+
+
+def test_search_is_deterministic():
+    def play(seed):
+        game = HeadlessGame(seed=seed, player_classes=[_FixedPlayouts, AIPlayer])
+        result = game.play()
+        return result, game.players[0].nb_playouts, [bytes(p.cards.cards) for p in game.players]
+
+    for seed in range(3):
+        assert play(seed) == play(seed)
+
+
+def _scalar_rewards(state: GameState, n: int, rng: random.Random, max_turns: int) -> np.ndarray:
+    rewards = np.zeros(state.nb_players)
+    deck = list(state.deck)
+    for _ in range(n):
+        rng.shuffle(state.deck)
+        depth, nb_turns = 0, state.nb_turns
+        while not state.is_over and state.nb_turns - nb_turns < max_turns:
+            state.apply(rollout_action(state, rng))
+            depth += 1
+        rewards += MCTSAIPlayer._rewards(None, state)
+        for _ in range(depth):
+            state.undo()
+        state.deck[:] = deck
+    return rewards / n
+
+
+def test_batch_rollouts_match_scalar_playouts():
+    rng = random.Random(0)
+    nb_checked = 0
+    for seed in range(6):
+        game = HeadlessGame(seed=seed, nb_players=2 + seed % 3, nb_cards=4 + seed % 2)
+        state = GameState.from_game(game, game.players[0], game.pop_card())
+        for _ in range(rng.randrange(8)):
+            actions = state.legal_actions()
+            state.apply(actions[rng.randrange(len(actions))])
+        while not state.is_over and state.phase != PLAY:
+            state.apply(rollout_action(state, rng))
+        if state.is_over:
+            continue
+        for max_turns in (3, 1000):
+            expected = _scalar_rewards(state, 3000, rng, max_turns)
+            batch = BatchRollouts(state.nb_players, max(len(h) for h in state.hands), np.random.default_rng(seed))
+            batch.add(state, 3000)
+            # about 4 standard errors of the difference of two means of 3000 rewards in [0, 1]
+            assert np.abs(batch.play(max_turns)[0] - expected).max() < .05
+        nb_checked += 1
+    assert nb_checked >= 4
@@ -0,0 +1,47 @@
+import pytest
+
+from headless import HeadlessGame, game_seeds
+from kobo_ai import AIParams, AIPlayer
+from policy_table import PolicyTable, TableAIPlayer, check_agreement
+
+
+def test_table_agrees_with_ai_player():
+    table = PolicyTable.build(max_hand=3)
+    assert check_agreement(table, n_views=20000, n_games=200, seed=0) == 0
+
+
+def test_table_agrees_with_ai_player_params():
+    params = AIParams(kobo_max_points=4, jack_only_on_kobo=False)
+    table = PolicyTable.build(max_hand=3, params=params)
+    assert check_agreement(table, n_views=20000, n_games=200, seed=0) == 0
+
+
+def test_table_player_plays_the_same_games():
+    player_class = TableAIPlayer.with_table(PolicyTable.build(max_hand=3))
+    for seed in game_seeds(200, 0):
+        expected = HeadlessGame(nb_cards=3, seed=seed, player_classes=[AIPlayer, AIPlayer]).play()
+        result = HeadlessGame(nb_cards=3, seed=seed, player_classes=[player_class, player_class]).play()
+        assert result == expected
+
+
+def test_table_player_needs_a_table_of_its_params():
+    with pytest.raises(ValueError):
+        HeadlessGame(player_classes=[TableAIPlayer, AIPlayer])
+    player_class = TableAIPlayer.with_table(PolicyTable.build(max_hand=1)).with_params(AIParams(kobo_max_points=4))
+    with pytest.raises(ValueError):
+        HeadlessGame(player_classes=[player_class, AIPlayer])
+
+
+@pytest.mark.parametrize('params', [
+    AIParams(),
+    AIParams(great_ranks=frozenset((1, 13)), scarce_counts=(), kobo_max_points=0, jack_only_on_kobo=False),
+    AIParams(scarce_counts=(3, 1, 2), kobo_max_points=15),
+])
+def test_save_and_load(tmp_path, params):
+    table = PolicyTable.build(max_hand=2, params=params)
+    path = tmp_path / 'table.bin'
+    table.save(str(path))
+    loaded = PolicyTable.load(str(path))
+    assert loaded.max_hand == table.max_hand
+    assert loaded.params == table.params
+    assert loaded.data == table.data
@@ -0,0 +1,43 @@
+from bench import MAX_RESET_BYTES_PER_GAME, MAX_RESET_GC_COLLECTIONS, MAX_RESET_PEAK_BYTES, bench_reset
+from headless import HeadlessGame, game_seeds
+
+
+def _state(game: HeadlessGame):
+    return (
+        [(bytes(p.cards.cards), p.cards.discovered, p.is_kobo) for p in game.players],
+        list(game.deck),
+        list(game.thrown_deck),
+        list(game.counter.deck_counts),
+        list(game.counter.thrown_counts),
+        game.seed,
+    )
+
+
+def _check_reset(**kwargs):
+    seeds = game_seeds(300, 0)
+    game = HeadlessGame(seed=seeds[0], **kwargs)
+    for seed in seeds:
+        game.reset(seed)
+        fresh = HeadlessGame(seed=seed, **kwargs)
+        assert _state(game) == _state(fresh)
+        assert game.play() == fresh.play()
+        assert _state(game) == _state(fresh)
+
+
+def test_reset_matches_a_new_game():
+    _check_reset()
+
+
+def test_reset_matches_a_new_game_with_more_players():
+    _check_reset(nb_players=3, nb_cards=5)
+
+
+def test_reset_matches_a_new_game_with_kobo_round():
+    _check_reset(kobo_round=True)
+
+
+def test_reset_does_not_allocate():
+    results = bench_reset(n_games=500)
+    assert results['reset_bytes_per_game'] <= MAX_RESET_BYTES_PER_GAME
+    assert results['reset_peak_bytes'] <= MAX_RESET_PEAK_BYTES
+    assert results['reset_gc_collections'] == MAX_RESET_GC_COLLECTIONS == 0
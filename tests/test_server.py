@@ -0,0 +1,50 @@
+import asyncio
+
+from server import LINE_LIMIT, GameServer
+
+
+async def _next_prompt(reader: asyncio.StreamReader) -> str:
+    while True:
+        words = (await reader.readline()).decode().split()
+        assert words, 'connection closed before a prompt'
+        if words[0] in ('PROMPT', 'END'):
+            return words[0]
+
+
+async def _play_bad_answers(answers) -> list:
+    game_server = GameServer(seed=0, nb_workers=1)
+    server = await game_server.start(port=0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    replies = []
+    try:
+        assert await _next_prompt(reader) == 'PROMPT'
+        for chunks in answers:
+            for chunk in chunks:
+                writer.write(chunk)
+                await writer.drain()
+                await asyncio.sleep(.01)
+            replies.append((await reader.readline()).decode().split()[0])
+            assert await _next_prompt(reader) == 'PROMPT'
+        # the session goes on to the end of the game
+        while True:
+            writer.write(b'1\n')
+            if await _next_prompt(reader) == 'END':
+                break
+    finally:
+        writer.close()
+        server.close()
+        await server.wait_closed()
+    assert game_server.results
+    return replies
+
+
+def test_server_answers_invalid_to_bad_lines():
+    answers = [
+        [b'\xff\xfe\n'],
+        ['²\n'.encode()],
+        [b'1' * (10 * LINE_LIMIT) + b'\n'],
+        # a long line arriving in several reads
+        [b'2' * (LINE_LIMIT + 10), b'2' * (2 * LINE_LIMIT), b' K\n'],
+    ]
+    assert asyncio.run(_play_bad_answers(answers)) == ['INVALID'] * len(answers)
@@ -0,0 +1,48 @@
+import random
+
+from headless import HeadlessGame
+from state import GameState
+
+
+def _snapshot(state: GameState):
+    return (
+        tuple((bytes(h.cards), h.discovered) for h in state.hands),
+        tuple(state.kobo),
+        tuple(state.deck),
+        tuple(state.thrown),
+        tuple(state.counter.deck_counts),
+        tuple(state.counter.thrown_counts),
+        state.turn, state.phase, state.deck_card, state.thrown_rank, state.pending, state.winner, state.nb_turns,
+        state.hash,
+    )
+
+
+def _check_hash(state: GameState):
+    incremental = state.hash
+    state.rehash()
+    assert state.hash == incremental
+
+
+def test_undo_restores_the_state_and_the_hash_is_incremental():
+    rng = random.Random(5)
+    for g in range(300):
+        game = HeadlessGame(seed=g, nb_players=2 + g % 3, nb_cards=4 + g % 3)
+        state = GameState.from_game(game, game.players[0], game.pop_card())
+        _check_hash(state)
+        root = _snapshot(state)
+        stack = []
+        for _ in range(400):
+            if state.is_over or (stack and rng.random() < .3):
+                if not stack:
+                    break
+                state.undo()
+                assert _snapshot(state) == stack.pop()
+            else:
+                stack.append(_snapshot(state))
+                actions = state.legal_actions()
+                state.apply(actions[rng.randrange(len(actions))])
+                _check_hash(state)
+        while stack:
+            state.undo()
+            assert _snapshot(state) == stack.pop()
+        assert _snapshot(state) == root
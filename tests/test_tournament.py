@@ -0,0 +1,18 @@
+from decision_cache import prebuild
+from headless import run_games
+from kobo_ai import AIPlayer
+from tournament import TournamentStats, run_tournament
+
+
+def test_tournament_with_a_decision_cache(tmp_path):
+    path = str(tmp_path / 'decisions.cache')
+    prebuild(path, n=200, seed=1)
+    expected = TournamentStats(2)
+    for result in run_games(600, seed=0):
+        expected.add(result)
+
+    previous = AIPlayer.decision_cache
+    assert run_tournament(600, seed=0, nb_workers=1, chunk_size=100, decision_cache_path=path) == expected
+    assert AIPlayer.decision_cache is previous
+    assert run_tournament(600, seed=0, nb_workers=2, chunk_size=100, decision_cache_path=path) == expected
+    assert AIPlayer.decision_cache is previous
@@ -0,0 +1,125 @@
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+from typing import List, Sequence
+import os
+
+from decision_cache import DecisionCache
+from headless import GameEnd, GameResult, game_seeds, play_games
+from kobo_ai import AIPlayer, EmptyDeckRule
+
+
+@dataclass
+class TournamentStats:
+    nb_players: int
+    nb_games: int = 0
+    victories: List[int] = field(default_factory=list)
+    draws: int = 0
+    nb_turns: int = 0
+    max_turns_reached: int = 0
+
+    def __post_init__(self):
+        if not self.victories:
+            self.victories = [0] * self.nb_players
+
+    def add(self, result: GameResult):
+        self.nb_games += 1
+        self.nb_turns += result.nb_turns
+        if result.winner is None:
+            self.draws += 1
+            if result.end == GameEnd.MAX_TURNS:
+                self.max_turns_reached += 1
+        else:
+            self.victories[result.winner] += 1
+
+    def merge(self, other: 'TournamentStats'):
+        self.nb_games += other.nb_games
+        self.victories = [a + b for a, b in zip(self.victories, other.victories)]
+        self.draws += other.draws
+        self.nb_turns += other.nb_turns
+        self.max_turns_reached += other.max_turns_reached
+
+    def losses(self, seat: int) -> int:
+        return self.nb_games - self.draws - self.victories[seat]
+
+    def win_rate(self, seat: int) -> float:
+        return self.victories[seat] / self.nb_games if self.nb_games else 0.
+
+    @property
+    def mean_turns(self) -> float:
+        return self.nb_turns / self.nb_games if self.nb_games else 0.
+
+
+def _install_decision_cache(decision_cache_path: str):
+    """ opens the cache once per worker, its chunks sharing the warm entries.
+    """
+    if decision_cache_path is not None:
+        AIPlayer.decision_cache = DecisionCache(path=decision_cache_path)
+
+
+def _play_chunk(args) -> TournamentStats:
+    seeds, game_kwargs = args
+    stats = TournamentStats(len(game_kwargs['player_classes']))
+    for result in play_games(seeds, **game_kwargs):
+        stats.add(result)
+    return stats
+
+
+def run_tournament(
+    n: int,
+    seed=None,
+    player_classes: Sequence[type]=(AIPlayer, AIPlayer),
+    nb_cards=4,
+    empty_deck_rule: EmptyDeckRule=EmptyDeckRule.END_GAME,
+    max_turns=1000,
+    nb_workers: int=None,
+    chunk_size=1000,
+    decision_cache_path: str=None
+    ) -> TournamentStats:
+    """ plays `n` headless games across a pool of `nb_workers` processes.
+    Every game gets its own seed drawn from `seed`, so the stats are the same
+    whatever the number of workers and the same as `headless.run_games`.
+    With `decision_cache_path`, the AI players of each process look their
+    decisions up in this prebuilt `decision_cache.DecisionCache` file.
+    """
+    game_kwargs = dict(
+        player_classes=list(player_classes),
+        nb_cards=nb_cards,
+        empty_deck_rule=empty_deck_rule,
+        max_turns=max_turns,
+    )
+    seeds = game_seeds(n, seed)
+    chunks = [(seeds[i:i + chunk_size], game_kwargs) for i in range(0, n, chunk_size)]
+    nb_workers = nb_workers or os.cpu_count()
+
+    if nb_workers == 1:
+        previous = AIPlayer.decision_cache
+        try:
+            _install_decision_cache(decision_cache_path)
+            chunk_stats = [_play_chunk(chunk) for chunk in chunks]
+        finally:
+            if AIPlayer.decision_cache is not previous:
+                AIPlayer.decision_cache.close()
+            AIPlayer.decision_cache = previous
+    else:
+        with Pool(nb_workers, initializer=_install_decision_cache, initargs=(decision_cache_path,)) as pool:
+            chunk_stats = pool.map(_play_chunk, chunks)
+
+    stats = TournamentStats(len(player_classes))
+    for s in chunk_stats:
+        stats.merge(s)
+    return stats
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='plays AI vs AI games across processes.')
+    parser.add_argument('-n', type=int, default=10000, help='number of games')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--decision-cache', default=None, help='prebuilt decision cache file')
+    args = parser.parse_args()
+
+    stats = run_tournament(args.n, seed=args.seed, nb_workers=args.workers, decision_cache_path=args.decision_cache)
+    for seat in range(stats.nb_players):
+        print(f'player {seat}: {stats.victories[seat]} victories, {stats.losses(seat)} losses ({stats.win_rate(seat):.2%})')
+    print(f'draws: {stats.draws}, mean turns: {stats.mean_turns:.2f}')
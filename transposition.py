@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from enum import Enum
+
+
+class Eviction(Enum):
+    LRU = 'lru'
+    DEPTH = 'depth'
+
+
+class TranspositionTable:
+    """ bounded cache keyed by state hashes.
+    With `Eviction.LRU` the least recently used entry is evicted when the table
+    is full. With `Eviction.DEPTH` the table has `capacity` slots indexed by
+    the hash and an entry only replaces one computed with less depth of search.
+    """
+    def __init__(self, capacity: int=1 << 16, eviction: Eviction=Eviction.LRU):
+        self.capacity = capacity
+        self.eviction = eviction
+        if eviction == Eviction.LRU:
+            self._entries = OrderedDict()
+        else:
+            self._keys = [None] * capacity
+            self._values = [None] * capacity
+            self._depths = [0] * capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: int, default=None):
+        if self.eviction == Eviction.LRU:
+            value = self._entries.get(key, default)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return value
+        slot = key % self.capacity
+        if self._keys[slot] == key:
+            self.hits += 1
+            return self._values[slot]
+        self.misses += 1
+        return default
+
+    def put(self, key: int, value, depth: int=0):
+        if self.eviction == Eviction.LRU:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return
+        slot = key % self.capacity
+        if self._keys[slot] is not None and self._keys[slot] != key:
+            if self._depths[slot] > depth:
+                return
+            self.evictions += 1
+        self._keys[slot] = key
+        self._values[slot] = value
+        self._depths[slot] = depth
+
+    def __len__(self):
+        if self.eviction == Eviction.LRU:
+            return len(self._entries)
+        return sum(1 for k in self._keys if k is not None)
+
+    def clear(self):
+        self.__init__(self.capacity, self.eviction)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    def stats(self) -> dict:
+        return dict(
+            size=len(self),
+            capacity=self.capacity,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            hit_rate=self.hit_rate,
+        )
@@ -0,0 +1,176 @@
+from dataclasses import dataclass, replace
+from multiprocessing import Pool
+from typing import List
+import math
+import os
+import random
+
+from headless import HeadlessGame, game_seeds
+from kobo_ai import DEFAULT_AI_PARAMS, AIParams, AIPlayer, Rank
+
+RUNNING = 'running'
+DROPPED = 'dropped'
+ACCEPTED = 'accepted'
+UNDECIDED = 'undecided'
+
+
+@dataclass
+class Candidate:
+    """ a set of params tested against the baseline with a sequential
+    probability ratio test on its decisive games.
+    """
+    params: AIParams
+    wins: int = 0
+    losses: int = 0
+    draws: int = 0
+    llr: float = 0.
+    status: str = RUNNING
+
+    @property
+    def nb_games(self) -> int:
+        return self.wins + self.losses + self.draws
+
+    @property
+    def win_rate(self) -> float:
+        decisive = self.wins + self.losses
+        return self.wins / decisive if decisive else .5
+
+
+class SPRT:
+    """ tests H0: the candidate wins `p0` of its decisive games
+    against H1: it wins `p1` of them, with error rates `alpha` and `beta`.
+    """
+    def __init__(self, p0=.5, p1=.55, alpha=.05, beta=.05):
+        self.win_llr = math.log(p1 / p0)
+        self.loss_llr = math.log((1 - p1) / (1 - p0))
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+    def update(self, candidate: Candidate, wins: int, losses: int, draws: int):
+        candidate.wins += wins
+        candidate.losses += losses
+        candidate.draws += draws
+        candidate.llr += wins * self.win_llr + losses * self.loss_llr
+        if candidate.llr <= self.lower:
+            candidate.status = DROPPED
+        elif candidate.llr >= self.upper:
+            candidate.status = ACCEPTED
+
+
+def random_params(rng: random.Random) -> AIParams:
+    return AIParams(
+        great_ranks=frozenset(
+            [Rank.ACE.value] + [r for r in (Rank.TWO.value, Rank.THREE.value, Rank.FOUR.value, Rank.TEN.value) if rng.random() < .5]
+        ),
+        scarce_counts=rng.choice([(), (1,), (2,), (1, 2), (1, 2, 3)]),
+        kobo_max_points=rng.choice([None, 3, 5, 7, 10, 15]),
+        jack_only_on_kobo=rng.random() < .5,
+    )
+
+
+def mutate(params: AIParams, rng: random.Random) -> AIParams:
+    """ returns `params` with one of its fields drawn again.
+    """
+    field = rng.choice(['great_ranks', 'scarce_counts', 'kobo_max_points', 'jack_only_on_kobo'])
+    return replace(params, **{field: getattr(random_params(rng), field)})
+
+
+def _play_batch(args):
+    """ plays every seed twice, the candidate taking each seat once,
+    returns the wins, losses and draws of the candidate.
+    """
+    index, params, baseline, seeds, game_kwargs = args
+    candidate_class, baseline_class = AIPlayer.with_params(params), AIPlayer.with_params(baseline)
+    wins, losses, draws = 0, 0, 0
+    for seed in seeds:
+        for seat in range(2):
+            player_classes = [candidate_class, baseline_class] if seat == 0 else [baseline_class, candidate_class]
+            result = HeadlessGame(seed=seed, player_classes=player_classes, **game_kwargs).play()
+            if result.winner is None:
+                draws += 1
+            elif result.winner == seat:
+                wins += 1
+            else:
+                losses += 1
+    return index, wins, losses, draws
+
+
+def evaluate(
+    candidates: List[Candidate],
+    baseline: AIParams=DEFAULT_AI_PARAMS,
+    seed=None,
+    batch_size=200,
+    max_games=20000,
+    sprt: SPRT=None,
+    nb_workers: int=None,
+    **game_kwargs
+    ) -> List[Candidate]:
+    """ plays rounds of `batch_size` deals for every running candidate
+    across a process pool, until each is dropped, accepted or reaches
+    `max_games` games. All the candidates play the same deals.
+    """
+    sprt = sprt or SPRT()
+    nb_workers = nb_workers or os.cpu_count()
+    rng = random.Random(seed)
+    chunk_size = max(1, batch_size // nb_workers)
+    with Pool(nb_workers) as pool:
+        while True:
+            running = [i for i, c in enumerate(candidates) if c.status == RUNNING]
+            if len(running) == 0:
+                break
+            seeds = game_seeds(batch_size, rng.getrandbits(64))
+            tasks = [
+                (i, candidates[i].params, baseline, seeds[j:j + chunk_size], game_kwargs)
+                for i in running for j in range(0, batch_size, chunk_size)
+            ]
+            totals = {i: [0, 0, 0] for i in running}
+            for i, wins, losses, draws in pool.imap_unordered(_play_batch, tasks):
+                total = totals[i]
+                total[0] += wins
+                total[1] += losses
+                total[2] += draws
+            for i in running:
+                c = candidates[i]
+                sprt.update(c, *totals[i])
+                if c.status == RUNNING and c.nb_games >= max_games:
+                    c.status = UNDECIDED
+    return candidates
+
+
+def tune(
+    nb_candidates=32,
+    generations=1,
+    seed=None,
+    baseline: AIParams=DEFAULT_AI_PARAMS,
+    **evaluate_kwargs
+    ) -> List[Candidate]:
+    """ random search for the first generation, then every generation
+    mutates the best candidates of the previous one.
+    Returns every candidate tested, the best first.
+    """
+    rng = random.Random(seed)
+    tested = []
+    params = [random_params(rng) for _ in range(nb_candidates)]
+    for _ in range(generations):
+        candidates = evaluate([Candidate(p) for p in params], baseline, rng.getrandbits(64), **evaluate_kwargs)
+        tested += candidates
+        parents = sorted(tested, key=lambda c: c.win_rate, reverse=True)[:max(1, nb_candidates // 4)]
+        params = [mutate(rng.choice(parents).params, rng) for _ in range(nb_candidates)]
+    return sorted(tested, key=lambda c: c.win_rate, reverse=True)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='tunes the params of the AI by self play.')
+    parser.add_argument('-n', type=int, default=32, help='number of candidates per generation')
+    parser.add_argument('--generations', type=int, default=1)
+    parser.add_argument('--max-games', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    candidates = tune(args.n, args.generations, seed=args.seed, max_games=args.max_games, nb_workers=args.workers)
+    nb_games = sum(c.nb_games for c in candidates)
+    for c in candidates:
+        print(f'{c.status:>9} {c.win_rate:.3f} over {c.nb_games} games: {c.params}')
+    print(f'{nb_games} games played, {len(candidates) * args.max_games} without early stopping')